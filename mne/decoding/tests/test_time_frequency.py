@@ -4,10 +4,11 @@
 
 
 import numpy as np
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_equal, assert_allclose, assert_equal
 from nose.tools import assert_raises
 from mne.utils import requires_sklearn
 from mne.decoding.time_frequency import TimeFrequency
+from mne.time_frequency.tfr import _compute_tfr
 
 
 @requires_sklearn
@@ -39,3 +40,44 @@ def test_timefrequency():
     tf = TimeFrequency(frequencies, sfreq=100, decim=2)
     Xt = tf.transform(X)
     assert_array_equal(Xt.shape, [n_epochs, n_chans, n_freqs, n_times // 2])
+
+
+@requires_sklearn
+def test_timefrequency_fft_equivalence():
+    """Test that the fft path matches the non-fft reference values."""
+    rng = np.random.RandomState(42)
+    n_epochs, n_chans, n_times = 4, 2, 512
+    X = rng.randn(n_epochs, n_chans, n_times)
+    sfreq = 128.
+    frequencies = [8., 16.]
+    # The fft path evaluates the Morlet kernel in closed form while the
+    # non-fft path convolves with a truncated sampled wavelet, so morlet
+    # only agrees to ~1e-6 relative; multitaper uses the same sampled
+    # tapers on both paths and agrees to machine precision.
+    tols = dict(morlet=dict(rtol=1e-5, atol=5e-4),
+                multitaper=dict(rtol=1e-10, atol=1e-12))
+    for method in ('morlet', 'multitaper'):
+        for output in ('complex', 'power', 'phase'):
+            if method == 'multitaper' and output == 'phase':
+                continue  # not implemented by _compute_tfr
+            for decim in (1, 3, slice(2, None, 4)):
+                tf = TimeFrequency(frequencies, sfreq=sfreq, method=method,
+                                   output=output, decim=decim, use_fft=True)
+                Xt = tf.transform(X)
+                ref = _compute_tfr(X, frequencies, sfreq=sfreq, method=method,
+                                   output=output, decim=decim, use_fft=False,
+                                   n_cycles=7.0)
+                assert_allclose(Xt, ref,
+                                err_msg=str((method, output, decim)),
+                                **tols[method])
+    # reduced-precision computations should stay close to double
+    for method in ('morlet', 'multitaper'):
+        ref = TimeFrequency(frequencies, sfreq=sfreq,
+                            method=method).transform(X)
+        Xt = TimeFrequency(frequencies, sfreq=sfreq, method=method,
+                           dtype=np.float32).transform(X)
+        assert_equal(Xt.dtype, np.complex64)
+        assert_allclose(Xt, ref, rtol=1e-4, atol=1e-4)
+        Xt = TimeFrequency(frequencies, sfreq=sfreq, method=method,
+                           output='power', dtype=np.float32).transform(X)
+        assert_equal(Xt.dtype, np.float32)
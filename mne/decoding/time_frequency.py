@@ -3,9 +3,118 @@
 # License: BSD (3-clause)
 
 import numpy as np
+from scipy.fftpack import fft, ifft
+
 from .mixin import TransformerMixin
 from .base import BaseEstimator
-from ..time_frequency.tfr import _compute_tfr, _check_tfr_param
+from ..filter import next_fast_len
+from ..parallel import check_n_jobs, parallel_func
+from ..time_frequency.tfr import _compute_tfr, _check_tfr_param, _make_dpss
+from ..utils import warn
+
+# Size (in bytes) of the complex coefficient slabs streamed by
+# TimeFrequency._transform_fft
+_SLAB_NBYTES = 2 ** 26
+
+_fft_backend = None
+
+_cupy = False  # False until the first import attempt, then module or None
+
+_checked_tfr_params = set()
+
+
+def _check_tfr_param_cached(frequencies, sfreq, method, zero_mean, n_cycles,
+                            time_bandwidth, use_fft, decim, output):
+    """Validate TFR parameters, memoized over repeated identical calls.
+
+    sklearn re-constructs estimators over and over (clone, GridSearchCV),
+    re-validating identical arguments each time. Remember which argument
+    sets already validated, and for those only redo the cheap
+    identity-preserving conversions of `_check_tfr_param` (sklearn clone
+    requires already-validated values to come back unchanged). Arguments
+    that cannot be turned into a hashable key are validated directly.
+    """
+    try:
+        freq_key = tuple(np.asarray(frequencies, dtype=np.float64).ravel())
+        cyc = np.asarray(n_cycles, dtype=np.float64)
+        cyc_key = tuple(cyc.ravel()) if cyc.ndim > 0 else float(cyc)
+        if isinstance(decim, slice):  # slices do not hash
+            decim_key = ('slice', decim.start, decim.stop, decim.step)
+        else:
+            decim_key = decim
+        key = (freq_key, float(sfreq), method, zero_mean, cyc_key,
+               time_bandwidth, use_fft, decim_key, output)
+    except (TypeError, ValueError):
+        key = None
+    if key is None or key not in _checked_tfr_params:
+        res = _check_tfr_param(frequencies, sfreq, method, zero_mean,
+                               n_cycles, time_bandwidth, use_fft, decim,
+                               output)
+        if key is not None:
+            if len(_checked_tfr_params) > 32:
+                _checked_tfr_params.clear()
+            _checked_tfr_params.add(key)
+        return res
+    # known-good arguments, conversions only
+    frequencies = np.asarray(frequencies, dtype=float)
+    sfreq = float(sfreq)
+    zero_mean = method == 'multitaper' if zero_mean is None else zero_mean
+    if isinstance(n_cycles, (int, float)):
+        n_cycles = float(n_cycles)
+    else:
+        n_cycles = np.array(n_cycles)
+    if method == 'multitaper':
+        time_bandwidth = (4.0 if time_bandwidth is None
+                          else float(time_bandwidth))
+    if isinstance(decim, int):
+        decim = slice(None, None, decim)
+    return frequencies, sfreq, zero_mean, n_cycles, time_bandwidth, decim
+
+
+def _get_cupy():
+    """Import (once) and return the cupy module, or None.
+
+    As with mne.cuda, a requested but unusable GPU demotes to CPU
+    processing with a warning instead of raising.
+    """
+    global _cupy
+    if _cupy is False:
+        try:
+            import cupy
+            cupy.zeros(1)  # make sure a device is actually usable
+        except Exception:
+            warn('CUDA not usable through cupy, falling back on CPU '
+                 'processing')
+            _cupy = None
+        else:
+            _cupy = cupy
+    return _cupy
+
+
+def _get_fft_backend():
+    """Get (fft, ifft, rfft, irfft) from the fastest FFT library available.
+
+    MKL and FFTW keep (and reuse) plans tuned for a given transform
+    length, which benefits the repeated fixed-size transforms of
+    TimeFrequency; fall back on fftpack / numpy when neither mkl_fft nor
+    pyfftw is installed.
+    """
+    global _fft_backend
+    if _fft_backend is None:
+        try:
+            import mkl_fft
+            _fft_backend = (mkl_fft.fft, mkl_fft.ifft, mkl_fft.rfft_numpy,
+                            mkl_fft.irfft_numpy)
+        except (ImportError, AttributeError):
+            try:
+                import pyfftw
+                # keep the FFTW plans alive across transform calls
+                pyfftw.interfaces.cache.enable()
+                npf = pyfftw.interfaces.numpy_fft
+                _fft_backend = (npf.fft, npf.ifft, npf.rfft, npf.irfft)
+            except ImportError:
+                _fft_backend = (fft, ifft, np.fft.rfft, np.fft.irfft)
+    return _fft_backend
 
 
 class TimeFrequency(TransformerMixin, BaseEstimator):
@@ -47,9 +156,15 @@ class TimeFrequency(TransformerMixin, BaseEstimator):
         * 'power' : single trial power.
         * 'phase' : single trial phase.
 
-    n_jobs : int, defaults to 1
+    n_jobs : int | str, defaults to 1
         The number of epochs to process at the same time. The parallelization
-        is implemented across channels.
+        is implemented across channels. Can be 'cuda' if cupy is installed
+        properly and use_fft=True, to run the convolutions on the GPU.
+    dtype : np.float32 | np.float64 | None, defaults to None
+        Precision of the computations (and of the output: complex64 or
+        float32 for np.float32). If None, the precision of the input data
+        is used. Single precision halves the memory used by the
+        intermediate buffers and can be substantially faster.
     verbose : bool, str, int, or None, defaults to None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -62,11 +177,12 @@ class TimeFrequency(TransformerMixin, BaseEstimator):
 
     def __init__(self, frequencies, sfreq=1.0, method='morlet', n_cycles=7.0,
                  time_bandwidth=None, use_fft=True, decim=1, output='complex',
-                 n_jobs=1, verbose=None):  # noqa: D102
+                 n_jobs=1, dtype=None, verbose=None):  # noqa: D102
         """Init TimeFrequency transformer."""
         frequencies, sfreq, _, n_cycles, time_bandwidth, decim = \
-            _check_tfr_param(frequencies, sfreq, method, True, n_cycles,
-                             time_bandwidth, use_fft, decim, output)
+            _check_tfr_param_cached(frequencies, sfreq, method, True,
+                                    n_cycles, time_bandwidth, use_fft, decim,
+                                    output)
         self.frequencies = frequencies
         self.sfreq = sfreq
         self.method = method
@@ -80,7 +196,35 @@ class TimeFrequency(TransformerMixin, BaseEstimator):
                              "Got %s instead." % output)
         self.output = output
         self.n_jobs = n_jobs
+        if dtype is not None and np.dtype(dtype) not in (np.dtype(np.float32),
+                                                         np.dtype(np.float64)):
+            raise ValueError('dtype must be None, np.float32 or np.float64, '
+                             'got %s instead.' % (dtype,))
+        self.dtype = dtype
         self.verbose = verbose
+        # Cache of the wavelets and their spectra, keyed by the number of
+        # time samples and the precision. The wavelets only depend on the
+        # parameters above, so they can be reused across repeated transform
+        # calls (e.g. cross-validation folds) as long as the input length
+        # is unchanged.
+        self._wavelet_cache = dict()
+        # Output buffer reused across transform calls of constant shape
+        # (e.g. cross-validation folds), to avoid re-faulting fresh pages
+        # for every fold on large outputs
+        self._out_buffer = None
+        # The wavelet supports only depend on the parameters above, so
+        # precompute them once: together with the cache above this keeps
+        # next_fast_len and the length validation off the per-call path.
+        n_cycles_ = np.atleast_1d(n_cycles)
+        if method == 'morlet':
+            # 5-sigma support, cf. the time-domain construction in `morlet`
+            sigma_t = n_cycles_ / (2. * np.pi * frequencies)
+            self._wavelet_lengths = \
+                2 * np.ceil(5. * sigma_t * sfreq).astype(int) - 1
+        else:  # 'multitaper', cf. `_make_dpss`
+            self._wavelet_lengths = \
+                np.ceil(n_cycles_ / frequencies * sfreq).astype(int)
+        self._max_wlen = self._wavelet_lengths.max()
 
     def fit_transform(self, X, y=None):
         """Time-frequency transform of times series along the last axis.
@@ -134,6 +278,15 @@ class TimeFrequency(TransformerMixin, BaseEstimator):
             zero- or 1-dimensional.
 
         """
+        if self.use_fft:
+            # Fast path: works on a canonical contiguous (n_signals,
+            # n_times) batch whatever the input rank, so no singleton
+            # channel axis needs to be inserted and removed; the wavelet
+            # spectra are cached across calls, so repeated transforms of
+            # same-length data only pay for the FFTs of the data
+            # themselves.
+            return self._transform_fft(X)
+
         # Ensure 3-dimensional X
         shape = X.shape[1:-1]
         if not shape:
@@ -142,11 +295,334 @@ class TimeFrequency(TransformerMixin, BaseEstimator):
         # Compute time-frequency
         Xt = _compute_tfr(X, self.frequencies, self.sfreq, self.method,
                           self.n_cycles, True, self.time_bandwidth,
-                          self.use_fft, self.decim, self.output, self.n_jobs,
-                          self.verbose)
+                          self.use_fft, self.decim, self.output,
+                          self.n_jobs, self.verbose)
 
         # Back to original shape
         if not shape:
             Xt = Xt[:, 0, :]
 
         return Xt
+
+    def _get_kernels(self, n_times, cdtype):
+        """Get the wavelet spectra for signals of length n_times.
+
+        On the first call for a given input length and precision, the
+        wavelets are built with the existing generators, padded to the
+        convolution size and FFT'd; subsequent calls reuse the cached
+        spectra.
+
+        Returns
+        -------
+        fsize : int
+            The padded FFT length.
+        fft_Ws : array, shape (n_tapers, n_freqs, fsize)
+            The spectra of the wavelets.
+        fold : tuple | None
+            Spectral-folding decimation info (see `_fold_params`), or None
+            if the decimation cannot be folded into the inverse FFT.
+        """
+        if (n_times, cdtype) in self._wavelet_cache:
+            return self._wavelet_cache[n_times, cdtype]
+
+        if self._max_wlen > n_times:
+            raise ValueError('At least one of the wavelets is longer than '
+                             'the signal. Use a longer signal or shorter '
+                             'wavelets.')
+        fsize, fold = self._fold_params(n_times)
+        if self.method == 'morlet':
+            fft_Ws = self._morlet_fourier(fsize)
+            # the analytic Morlet spectra are real-valued and centered
+            fft_Ws = fft_Ws.astype(np.float32 if cdtype == np.complex64
+                                   else np.float64)
+            if self.output == 'power':
+                # Split each spectrum into its even and odd parts: against
+                # the Hermitian spectrum of the real input, the even part
+                # gives the real part of the coefficients and the odd part
+                # (times -1j) the imaginary part, so the power can be
+                # accumulated from two real-output irffts without going
+                # through complex coefficients at all.
+                W = fft_Ws[0]
+                W_rev = np.roll(W[:, ::-1], 1, axis=-1)
+                n_rfft = fsize // 2 + 1
+                fft_Ws = ((W + W_rev)[:, :n_rfft] / 2.,
+                          (W - W_rev)[:, :n_rfft] / 2.)
+        else:  # 'multitaper'
+            Ws = _make_dpss(self.sfreq, self.frequencies,
+                            n_cycles=self.n_cycles,
+                            time_bandwidth=self.time_bandwidth,
+                            zero_mean=True)
+            fft_ = _get_fft_backend()[0]
+            fft_Ws = np.empty((len(Ws), len(self.frequencies), fsize),
+                              dtype=cdtype)
+            for taper_idx, W in enumerate(Ws):
+                for freq_idx, Wk in enumerate(W):
+                    fft_Ws[taper_idx, freq_idx] = fft_(Wk, fsize)
+            # Bake the mode='same' centering of _cwt into the spectra as a
+            # circular time advance, so that the valid samples start at
+            # index 0 for every frequency, as with the analytic kernels
+            offsets = np.array([(len(W) - 1) // 2 for W in Ws[0]])
+            fft_Ws *= np.exp((2j * np.pi / fsize) *
+                             np.outer(offsets,
+                                      np.arange(fsize))).astype(cdtype)
+
+        self._wavelet_cache[n_times, cdtype] = fsize, fft_Ws, fold
+        return fsize, fft_Ws, fold
+
+    def _fold_params(self, n_times):
+        """Get the FFT length and the spectral-decimation setup.
+
+        Decimating by an integer factor is a subsampling of the inverse
+        FFT output, which is equivalent to summing ("folding") the product
+        spectrum into fsize // decim bins and taking an inverse FFT that is
+        decim times shorter -- same aliasing semantics, but the IFFT work
+        drops by the decimation factor. This only needs fsize to be a
+        multiple of the (5-smooth) decimation step.
+
+        Returns
+        -------
+        fsize : int
+            The padded FFT length (a multiple of the folded step).
+        fold : tuple (step, idx, conj) | None
+            The decimation step and the gather indices (with conjugation
+            mask) rebuilding the folded half spectrum on the real-valued
+            power path. None if folding does not apply.
+        """
+        min_size = n_times + self._max_wlen - 1
+        step = self.decim.step if self.decim.start in (None, 0) else None
+        if step is not None and step > 1:
+            smooth = step
+            for prime in (2, 3, 5):
+                while smooth % prime == 0:
+                    smooth //= prime
+            if smooth > 1:  # cannot keep fsize fast *and* divisible
+                step = None
+        if step is None or step == 1:
+            return next_fast_len(min_size), None
+        fsize = step * next_fast_len(int(np.ceil(min_size / float(step))))
+        # Half-spectrum folding for the power path: bins beyond fsize // 2
+        # are the conjugates of their mirrored counterparts
+        n_out = fsize // step
+        idx = (np.arange(n_out // 2 + 1) +
+               np.arange(step)[:, np.newaxis] * n_out)
+        conj = idx > fsize // 2
+        idx = np.where(conj, fsize - idx, idx)
+        return fsize, (step, idx, conj)
+
+    def _morlet_fourier(self, fsize):
+        """Evaluate the zero-mean Morlet spectra directly in Fourier space.
+
+        The Fourier transform of a Gaussian-windowed complex exponential is
+        a Gaussian centered on the wavelet frequency, so the spectra can be
+        written in closed form on the FFT frequency grid instead of building
+        the wavelets in time and FFT'ing them. The spectra are normalized
+        like `morlet` (squared norm of 2 in the time domain) and are
+        centered on t=0, so no convolution offset is needed.
+        """
+        freqs = self.frequencies
+        n_cycles = np.atleast_1d(self.n_cycles)
+        sigma_t = n_cycles / (2. * np.pi * freqs)
+        # Evaluate on the full signed frequency grid: for small n_cycles
+        # both Gaussians leak into the negative frequencies, so a one-sided
+        # (purely analytic) approximation would bias the coefficients.
+        xi = np.fft.fftfreq(fsize, 1. / self.sfreq)
+        sigma_t = sigma_t[:, np.newaxis]
+        zero_mean = np.exp(-2. * (np.pi * freqs[:, np.newaxis] *
+                                  sigma_t) ** 2)
+        fft_Ws = np.zeros((len(freqs), fsize))
+        # The DFT of the sampled wavelet is the continuous spectrum folded
+        # at the sampling frequency, so fold in the two adjacent replicas:
+        # for wide-band wavelets (small n_cycles and/or frequencies close
+        # to Nyquist) the aliased tails are not negligible.
+        for shift in (-self.sfreq, 0., self.sfreq):
+            fft_Ws += np.exp(-2. * (np.pi * sigma_t) ** 2 *
+                             (xi + shift - freqs[:, np.newaxis]) ** 2)
+            # zero-mean correction term (cf. zero_mean=True in `morlet`)
+            fft_Ws -= zero_mean * np.exp(-2. * (np.pi * sigma_t *
+                                                (xi + shift)) ** 2)
+        # Parseval: match the discrete norm `morlet` uses in time domain
+        fft_Ws *= np.sqrt(2. * fsize /
+                          np.sum(fft_Ws ** 2, axis=-1))[:, np.newaxis]
+        return fft_Ws[np.newaxis]
+
+    def _transform_fft(self, X):
+        """FFT convolution with the cached wavelet spectra.
+
+        Parameters
+        ----------
+        X : array, shape (..., n_times)
+            The data, of any rank; the transform runs along the last axis.
+
+        Returns
+        -------
+        Xt : array, shape (..., n_freqs, n_times_decim)
+            The transformed data, with the leading axes of X preserved.
+        """
+        n_times = X.shape[-1]
+        # Single precision halves the bytes moved through the (large)
+        # intermediate buffers; fftpack has dedicated complex64 kernels
+        rdtype = X.dtype if self.dtype is None else np.dtype(self.dtype)
+        rdtype = np.float32 if rdtype == np.float32 else np.float64
+        cdtype = np.complex64 if rdtype == np.float32 else np.complex128
+        fsize, fft_Ws, fold = self._get_kernels(n_times, cdtype)
+        n_tapers = 1 if isinstance(fft_Ws, tuple) else len(fft_Ws)
+        n_freqs = len(self.frequencies)
+        n_times_out = X[..., self.decim].shape[-1]
+        out_shape = X.shape[:-1] + (n_freqs, n_times_out)
+
+        # Flatten all leading axes into a single canonical batch axis so
+        # that the convolutions run as one vectorized FFT / IFFT call
+        # instead of per-signal transforms; make the batch contiguous so
+        # the FFT backend does not fall back on a strided (or internally
+        # copied) code path.
+        X2 = np.ascontiguousarray(X.reshape(-1, n_times))
+        dtype = cdtype if self.output == 'complex' else rdtype
+        # Freq-major layout: with the frequency axis leading, each
+        # frequency's product spectrum, inverse FFT and reduction sweep a
+        # contiguous (n_signals, fsize) slab, which keeps the memory-bound
+        # reduction streaming instead of striding. The user-facing axis
+        # order is restored at the end with a stride-only view.
+        # Reuse the accumulation buffer when the shape is unchanged (an
+        # explicit memset is much cheaper than faulting in fresh zeroed
+        # pages); the caller always gets its own copy, so the reuse stays
+        # invisible outside this method
+        shape = (n_freqs, len(X2), n_times_out)
+        if (self._out_buffer is not None and
+                self._out_buffer.shape == shape and
+                self._out_buffer.dtype == dtype):
+            Xt = self._out_buffer
+            Xt.fill(0)
+        else:
+            Xt = self._out_buffer = np.zeros(shape, dtype)
+
+        def _owned_output(Xt):
+            # Xt is the reused freq-major scratch buffer; copy into a
+            # fresh signal-major array so later transform calls cannot
+            # overwrite what the caller holds
+            out = np.empty(out_shape, dtype)
+            out.reshape(len(X2), n_freqs, n_times_out)[:] = \
+                np.moveaxis(Xt, 0, 1)
+            return out
+        # Stream the convolutions one slab of signals at a time, so that
+        # only one slab of complex coefficients (the largest buffer of the
+        # transform) is in memory, and the reduction to power / phase
+        # happens while the slab is still cache-hot
+        n_jobs = self.n_jobs
+        if n_jobs == 'cuda':
+            # As in mne.filter, n_jobs='cuda' routes the FFT work through
+            # the GPU; the kernel spectra are uploaded once per cached
+            # entry so repeated transforms only transfer the data
+            cupy = _get_cupy()
+            if cupy is None:
+                n_jobs = 1
+            else:
+                key = (n_times, cdtype, 'cuda')
+                dev_Ws = self._wavelet_cache.get(key)
+                if dev_Ws is None:
+                    dev_Ws = (tuple(cupy.asarray(W) for W in fft_Ws)
+                              if isinstance(fft_Ws, tuple) else
+                              cupy.asarray(fft_Ws))
+                    self._wavelet_cache[key] = dev_Ws
+                Xt_dev = cupy.zeros(Xt.shape, Xt.dtype)
+                self._apply_kernels(cupy.asarray(X2), dev_Ws, fold, fsize,
+                                    n_times, cdtype, Xt_dev)
+                Xt_dev /= n_tapers
+                Xt[:] = cupy.asnumpy(Xt_dev)
+                return _owned_output(Xt)
+        slab = int(_SLAB_NBYTES // (n_freqs * fsize *
+                                    np.dtype(cdtype).itemsize))
+        slab = max(slab, 1)
+        if n_jobs == 1 and len(X2) <= slab:
+            # Common case (e.g. transform called per-fold in a sklearn
+            # cross-validation): a single serial slab, so skip the n_jobs
+            # resolution and dispatch machinery altogether
+            self._apply_kernels(X2, fft_Ws, fold, fsize, n_times, cdtype,
+                                Xt)
+            Xt /= n_tapers
+            return _owned_output(Xt)
+        n_jobs = check_n_jobs(n_jobs)
+        if n_jobs > 1:
+            # distribute the slabs over at least n_jobs thread-sized chunks
+            slab = min(slab, int(np.ceil(len(X2) / float(n_jobs))))
+        slices = [slice(start, start + slab)
+                  for start in range(0, len(X2), slab)]
+        if n_jobs > 1 and len(slices) > 1:
+            # Threads instead of processes: fftpack releases the GIL and
+            # each worker reads and writes a disjoint slice of X2 / Xt in
+            # shared memory, so no data is pickled or copied across workers
+            parallel, p_apply, _ = parallel_func(
+                self._apply_kernels, n_jobs, max_nbytes=None,
+                backend='threading')
+            parallel(p_apply(X2[sl], fft_Ws, fold, fsize, n_times, cdtype,
+                             Xt[:, sl])
+                     for sl in slices)
+        else:
+            for sl in slices:
+                self._apply_kernels(X2[sl], fft_Ws, fold, fsize,
+                                    n_times, cdtype, Xt[:, sl])
+        Xt /= n_tapers
+        return _owned_output(Xt)
+
+    def _apply_kernels(self, X, fft_Ws, fold, fsize, n_times, cdtype, Xt):
+        """Transform, convolve, reduce and decimate one slab of signals."""
+        n_times_out = Xt.shape[-1]
+        if isinstance(X, np.ndarray):
+            xp = np
+            _, ifft_, rfft_, irfft_ = _get_fft_backend()
+        else:  # CuPy device array (n_jobs='cuda')
+            xp = _get_cupy()
+            ifft_, rfft_, irfft_ = (xp.fft.ifft, xp.fft.rfft, xp.fft.irfft)
+        # The input is real, so only compute the half-spectrum rfft and,
+        # where the kernels need it, rebuild the (conjugate-symmetric) full
+        # spectrum from it, which halves the cost of the forward transform
+        n_rfft = fsize // 2 + 1
+        X_rfft = rfft_(X, fsize)
+        if isinstance(fft_Ws, tuple):
+            # the real-valued power path works on the half spectrum
+            X_fft = xp.asarray(X_rfft, dtype=cdtype)
+        else:
+            X_fft = xp.empty((len(X), fsize), dtype=cdtype)
+            X_fft[:, :n_rfft] = X_rfft
+            X_fft[:, n_rfft:] = \
+                X_rfft[:, 1:fsize - n_rfft + 1][:, ::-1].conj()
+        if isinstance(fft_Ws, tuple):
+            # Power-only Morlet path: all-real convolution results. The
+            # even kernel gives the real part of the coefficients, the odd
+            # kernel (times -1j, restoring a Hermitian spectrum) the
+            # imaginary part; both convolutions are centered.
+            W_even, W_odd = fft_Ws
+            for fft_W in (W_even, W_odd * -1j):
+                prod = fft_W[:, np.newaxis, :] * X_fft
+                if fold is None:
+                    Y = irfft_(prod, fsize, axis=-1)
+                    Xt += Y[..., :n_times][..., self.decim] ** 2
+                else:
+                    step, idx, conj = fold
+                    prod = prod[..., idx]
+                    prod[..., conj] = prod[..., conj].conj()
+                    Y = irfft_(prod.sum(-2), fsize // step, axis=-1)
+                    Y /= step
+                    Xt += Y[..., :n_times_out] ** 2
+            return
+        for fft_W in fft_Ws:  # loop across tapers
+            prod = fft_W[:, np.newaxis, :] * X_fft
+            if fold is None:
+                coefs = ifft_(prod, axis=-1)
+                tfr = coefs[..., :n_times][..., self.decim]
+            else:
+                # fold the product spectrum so the inverse FFT directly
+                # yields the decimated samples (same aliasing semantics
+                # as subsampling the full-length output)
+                step = fold[0]
+                prod = prod.reshape(prod.shape[:-1] +
+                                    (step, fsize // step)).sum(-2)
+                tfr = ifft_(prod, axis=-1)[..., :n_times_out]
+                tfr /= step
+            if self.output == 'power':
+                # real arithmetic, no complex-modulus temporary
+                Xt += tfr.real ** 2
+                Xt += tfr.imag ** 2
+            elif self.output == 'phase':
+                Xt += xp.arctan2(tfr.imag, tfr.real)
+            else:  # 'complex'
+                Xt += tfr
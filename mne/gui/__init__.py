@@ -6,6 +6,18 @@
 
 from ..utils import _check_mayavi_version
 
+_gui_ready = False
+
+
+def _ensure_gui_ready():
+    """Probe the Mayavi/backend setup once per session."""
+    global _gui_ready
+    if not _gui_ready:
+        _check_mayavi_version()
+        from ._backend import _check_backend
+        _check_backend()
+        _gui_ready = True
+
 
 def combine_kit_markers():
     """Create a new KIT marker file by interpolating two marker files.
@@ -14,9 +26,7 @@ def combine_kit_markers():
     -----
     The functionality in this GUI is also part of :func:`kit2fiff`.
     """
-    _check_mayavi_version()
-    from ._backend import _check_backend
-    _check_backend()
+    _ensure_gui_ready()
     from ._marker_gui import CombineMarkersFrame
     gui = CombineMarkersFrame()
     gui.configure_traits()
@@ -62,9 +72,7 @@ def coregistration(tabbed=False, split=True, scene_width=500, inst=None,
     subjects for which no MRI is available
     <http://www.slideshare.net/mne-python/mnepython-scale-mri>`_.
     """
-    _check_mayavi_version()
-    from ._backend import _check_backend
-    _check_backend()
+    _ensure_gui_ready()
     from ._coreg_gui import CoregFrame, _make_view
     view = _make_view(tabbed, split, scene_width)
     gui = CoregFrame(inst, subject, subjects_dir, guess_mri_subject)
@@ -90,9 +98,7 @@ def fiducials(subject=None, fid_file=None, subjects_dir=None):
     All parameters are optional, since they can be set through the GUI.
     The functionality in this GUI is also part of :func:`coregistration`.
     """
-    _check_mayavi_version()
-    from ._backend import _check_backend
-    _check_backend()
+    _ensure_gui_ready()
     from ._fiducials_gui import FiducialsFrame
     gui = FiducialsFrame(subject, subjects_dir, fid_file=fid_file)
     gui.configure_traits()
@@ -107,9 +113,7 @@ def kit2fiff():
         $ mne kit2fiff
 
     """
-    _check_mayavi_version()
-    from ._backend import _check_backend
-    _check_backend()
+    _ensure_gui_ready()
     from ._kit2fiff_gui import Kit2FiffFrame
     gui = Kit2FiffFrame()
     gui.configure_traits()
@@ -19,7 +19,8 @@ else:
 
 
 @verbose
-def parallel_func(func, n_jobs, verbose=None, max_nbytes='auto'):
+def parallel_func(func, n_jobs, verbose=None, max_nbytes='auto',
+                  backend=None):
     """Return parallel instance with delayed function.
 
     Util function to use joblib only if available
@@ -40,6 +41,10 @@ def parallel_func(func, n_jobs, verbose=None, max_nbytes='auto'):
         or a human-readable string, e.g., '1M' for 1 megabyte.
         Use None to disable memmaping of large arrays. Use 'auto' to
         use the value set using mne.set_memmap_min_size.
+    backend : str | None
+        The joblib backend to use (e.g., 'threading'). None uses the
+        joblib default. Ignored if the installed joblib does not support
+        backend selection.
 
     Returns
     -------
@@ -90,6 +95,8 @@ def parallel_func(func, n_jobs, verbose=None, max_nbytes='auto'):
 
     # create keyword arguments for Parallel
     kwargs = {'verbose': 5 if logger.level <= logging.INFO else 0}
+    if backend is not None and 'backend' in p_args:
+        kwargs['backend'] = backend
 
     if joblib_mmap:
         if cache_dir is None:
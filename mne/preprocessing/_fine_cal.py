@@ -28,33 +28,31 @@ def read_fine_calibration(fname):
     _check_fname(fname, overwrite=True, must_exist=True)
     check_fname(fname, 'cal', ('.dat',))
     ch_names = list()
-    locs = list()
     imb_cals = list()
     with open(fname, 'r') as fid:
-        for line in fid:
-            if line[0] in '#\n':
-                continue
-            vals = line.strip().split()
-            if len(vals) not in [14, 16]:
-                raise RuntimeError('Error parsing fine calibration file, '
-                                   'should have 14 or 16 entries per line '
-                                   'but found %s on line:\n%s'
-                                   % (len(vals), line))
-            # `vals` contains channel number
-            ch_name = vals[0]
-            if len(ch_name) in (3, 4):  # heuristic for Neuromag fix
-                try:
-                    ch_name = int(ch_name)
-                except ValueError:  # something other than e.g. 113 or 2642
-                    pass
-                else:
-                    ch_name = 'MEG' + '%04d' % ch_name
-            ch_names.append(ch_name)
-            # (x, y, z), x-norm 3-vec, y-norm 3-vec, z-norm 3-vec
-            locs.append(np.array([float(x) for x in vals[1:13]]))
-            # and 1 or 3 imbalance terms
-            imb_cals.append([float(x) for x in vals[13:]])
-    locs = np.array(locs)
+        lines = [line for line in fid if line[0] not in '#\n']
+    rows = [line.strip().split() for line in lines]
+    for line, vals in zip(lines, rows):
+        if len(vals) not in [14, 16]:
+            raise RuntimeError('Error parsing fine calibration file, '
+                               'should have 14 or 16 entries per line '
+                               'but found %s on line:\n%s'
+                               % (len(vals), line))
+        # `vals` contains channel number
+        ch_name = vals[0]
+        if len(ch_name) in (3, 4):  # heuristic for Neuromag fix
+            try:
+                ch_name = int(ch_name)
+            except ValueError:  # something other than e.g. 113 or 2642
+                pass
+            else:
+                ch_name = 'MEG' + '%04d' % ch_name
+        ch_names.append(ch_name)
+        # 1 or 3 imbalance terms (can vary per line, so keep these ragged)
+        imb_cals.append([float(x) for x in vals[13:]])
+    # (x, y, z), x-norm 3-vec, y-norm 3-vec, z-norm 3-vec; parse all
+    # lines in one shot so the string-to-float work happens in C
+    locs = np.array([vals[1:13] for vals in rows], np.float64)
     return dict(ch_names=ch_names, locs=locs, imb_cals=imb_cals)
 
 
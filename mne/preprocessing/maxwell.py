@@ -21,14 +21,14 @@ from ..transforms import (_str_to_frame, _get_trans, Transform, apply_trans,
                           _sph_to_cart_partials, _deg_ord_idx,
                           _sh_complex_to_real, _sh_real_to_complex, _sh_negate)
 from ..forward import _concatenate_coils, _prep_meg_channels, _create_meg_coils
-from ..surface import _normalize_vectors
 from ..io.constants import FIFF
 from ..io.proc_history import _read_ctc
 from ..io.write import _generate_meas_id, _date_now
-from ..io import _loc_to_coil_trans, BaseRaw
+from ..io import BaseRaw
 from ..io.pick import pick_types, pick_info, pick_channels
+from ..parallel import check_n_jobs, parallel_func
 from ..utils import verbose, logger, _clean_names, warn, _time_mask
-from ..fixes import _get_args, _safe_svd, _get_sph_harm
+from ..fixes import _get_args, _get_sph_harm
 from ..externals.six import string_types
 from ..channels.channels import _get_T1T2_mag_inds
 
@@ -37,6 +37,10 @@ from ..channels.channels import _get_T1T2_mag_inds
 # truncated versions of constants (e.g., μ0), which could lead to small
 # differences between algorithms
 
+# Target working-set size (in bytes) for the time blocking of the
+# per-interval projection products in maxwell_filter
+_BLOCK_NBYTES = 2 ** 24
+
 
 @verbose
 def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
@@ -44,7 +48,7 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
                    st_correlation=0.98, coord_frame='head', destination=None,
                    regularize='in', ignore_ref=False, bad_condition='error',
                    head_pos=None, st_fixed=True, st_only=False, mag_scale=100.,
-                   verbose=None):
+                   precision='double', n_jobs=1, verbose=None):
     u"""Apply Maxwell filter to data using multipole moments.
 
     .. warning:: Automatic bad channel detection is not currently implemented.
@@ -150,6 +154,26 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
 
         .. versionadded:: 0.13
 
+    precision : str
+        Precision of the projection arithmetic, ``'double'`` (default) or
+        ``'mixed'``. In mixed mode the decomposition matrices and buffer
+        data are cast to single precision once per window, so the
+        BLAS-dominated projection products -- and, with tSSS, the
+        subspace-overlap factorizations -- run at half the memory
+        traffic. The decomposition itself (pseudo-inverse,
+        regularization) always runs in double precision. Differences in
+        the output are on the order of single-precision roundoff.
+
+        .. versionadded:: 0.14
+
+    n_jobs : int
+        Number of buffer windows to process concurrently (with threads,
+        since the underlying BLAS calls release the GIL). Only used when
+        ``head_pos`` is None, as movement compensation makes consecutive
+        windows dependent on each other.
+
+        .. versionadded:: 0.14
+
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -281,6 +305,10 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
                            'coord_frame="meg"')
     if st_only and st_duration is None:
         raise ValueError('st_duration must not be None if st_only is True')
+    if precision not in ('double', 'mixed'):
+        raise ValueError('precision must be "double" or "mixed", not %s'
+                         % (precision,))
+    proj_dtype = np.float32 if precision == 'mixed' else np.float64
     head_pos = _check_pos(head_pos, head_frame, raw, st_fixed,
                           raw.info['sfreq'])
     _check_info(raw.info, sss=not st_only, tsss=st_duration is not None,
@@ -298,6 +326,7 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
     info = raw_sss.info
     meg_picks, mag_picks, grad_picks, good_picks, mag_or_fine = \
         _get_mf_picks(info, int_order, ext_order, ignore_ref)
+    meg_picks_good = meg_picks[good_picks]
 
     # Magnetometers are scaled to improve numerical stability
     coil_scale, mag_scale = _get_coil_scale(
@@ -337,9 +366,16 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
             warn('Not all cross-talk channels in raw:\n%s' % missing)
         ctc_picks = pick_channels(ctc_chs,
                                   [info['ch_names'][c]
-                                   for c in meg_picks[good_picks]])
+                                   for c in meg_picks_good])
         assert len(ctc_picks) == len(good_picks)  # otherwise we errored
         ctc = sss_ctc['decoupler'][ctc_picks][:, ctc_picks]
+        # Put the per-buffer product in its best format once: CSR with
+        # sorted indices for the sparse-dense multiply, or plain dense so
+        # BLAS takes over when the matrix is not actually that sparse
+        ctc = ctc.tocsr()
+        ctc.sort_indices()
+        if ctc.nnz > 0.25 * np.prod(ctc.shape):
+            ctc = ctc.toarray()
         # I have no idea why, but MF transposes this for storage..
         sss_ctc['decoupler'] = sss_ctc['decoupler'].T.tocsc()
     else:
@@ -350,15 +386,20 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
     #
     exp = dict(origin=origin, int_order=int_order, ext_order=0)
     all_coils = _prep_mf_coils(info, ignore_ref)
-    S_recon = _trans_sss_basis(exp, all_coils, recon_trans, coil_scale)
+    # The reconstruction basis only ever multiplies moment data at
+    # proj_dtype, so store it there directly; the decomposition bases
+    # stay double for regularization and the pseudoinverse
+    S_recon = _trans_sss_basis(exp, all_coils, recon_trans, coil_scale,
+                               dtype=proj_dtype)
     exp['ext_order'] = ext_order
     # Reconstruct data from internal space only (Eq. 38), and rescale S_recon
-    S_recon /= coil_scale
+    # (in place via a one-time reciprocal rather than a broadcast divide)
+    S_recon *= 1. / coil_scale
     if recon_trans is not None:
         # warn if we have translated too far
         diff = 1000 * (info['dev_head_t']['trans'][:3, 3] -
                        recon_trans['trans'][:3, 3])
-        dist = np.sqrt(np.sum(_sq(diff)))
+        dist = float(np.linalg.norm(diff))
         if dist > 25.:
             warn('Head position change is over 25 mm (%s) = %0.1f mm'
                  % (', '.join('%0.1f' % x for x in diff), dist))
@@ -401,6 +442,9 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
     # Figure out which transforms we need for each tSSS block
     # (and transform pos[1] to times)
     head_pos[1] = raw_sss.time_as_index(head_pos[1], use_rounding=True)
+    # Which positions land in which buffer is fixed, so locate them all
+    # at once here rather than once per buffer in the loop
+    pos_bounds = np.searchsorted(head_pos[1], read_lims)
     # Compute the first bit of pos_data for cHPI reporting
     if info['dev_head_t'] is not None and head_pos[0] is not None:
         this_pos_quat = np.concatenate([
@@ -409,21 +453,107 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
             np.zeros(3)])
     else:
         this_pos_quat = None
+    # The position channels are piecewise constant across the whole
+    # recording, so expand them to per-sample values once up front and
+    # slice views per buffer rather than broadcast-filling each segment
+    if len(pos_picks) > 0:
+        n_times = len(raw_sss.times)
+        pos_samps = np.clip(head_pos[1], 0, n_times)
+        seg_lengths = np.diff(np.concatenate(([0], pos_samps, [n_times])))
+        quat_per_sample = np.repeat(
+            np.vstack((this_pos_quat[np.newaxis], head_pos[2])),
+            seg_lengths, axis=0).T
+    else:
+        quat_per_sample = np.empty((0, len(raw_sss.times)))
+    # One basis buffer shared by every (serial) decomposition call; the
+    # basis for each new head position is written over the previous one
+    basis_scratch = np.empty((all_coils[3], n_in + n_out))
     _get_this_decomp_trans = partial(
         _get_decomp, all_coils=all_coils,
         cal=calibration, regularize=regularize,
         exp=exp, ignore_ref=ignore_ref, coil_scale=coil_scale,
         grad_picks=grad_picks, mag_picks=mag_picks, good_picks=good_picks,
         mag_or_fine=mag_or_fine, bad_condition=bad_condition,
-        mag_scale=mag_scale)
+        mag_scale=mag_scale, basis_scratch=basis_scratch)
     S_decomp, pS_decomp, reg_moments, n_use_in = _get_this_decomp_trans(
         info['dev_head_t'], t=0.)
     reg_moments_0 = reg_moments.copy()
-    # Loop through buffer windows of data
+    S_decomp = S_decomp.astype(proj_dtype, copy=False)
+    pS_decomp = pS_decomp.astype(proj_dtype, copy=False)
+    # The reconstruction matrix for the regularized moments only changes
+    # when the decomposition does, so gather it once per position instead
+    # of once per sub-interval
+    S_recon_sel = np.ascontiguousarray(S_recon[:, reg_moments[:n_use_in]],
+                                       dtype=proj_dtype)
+    # Loop through buffer windows of data; fancy indexing into the raw
+    # data allocates a fresh copy every time, so reuse preallocated
+    # scratch blocks across buffers instead
+    max_samps = int((read_lims[1:] - read_lims[:-1]).max())
+    orig_buf = np.empty((len(meg_picks_good), max_samps))
+    out_meg_buf = np.empty((len(meg_picks), max_samps))
+    # Project in bounded time blocks so the moment and output
+    # intermediates stay cache-sized even for long tSSS windows
+    time_block = max(1, int(_BLOCK_NBYTES // (len(meg_picks) * 8)))
+    mm_scratch = np.empty((n_in + n_out, time_block), proj_dtype)
+    recon_scratch = np.empty((len(meg_picks), time_block), proj_dtype)
     n_sig = int(np.floor(np.log10(max(len(read_lims), 0)))) + 1
     pl = 's' if len(read_lims) != 2 else ''
     logger.info('    Processing %s data chunk%s of (at least) %0.1f sec'
                 % (len(read_lims) - 1, pl, st_duration / info['sfreq']))
+
+    def _process_static_window(start, stop, t_str):
+        """Process one window with a fixed decomposition (no movecomp)."""
+        orig_data = raw_sss._data[meg_picks_good, start:stop]
+        if cross_talk is not None:
+            orig_data = ctc.dot(orig_data)
+        orig_data = orig_data.astype(proj_dtype, copy=False)
+        out_meg_data = raw_sss._data[meg_picks,
+                                     start:stop].astype(proj_dtype,
+                                                        copy=False)
+        if st_correlation is not None:
+            resid = orig_data.copy()
+            if st_when == 'before':
+                mm_full = np.dot(pS_decomp, resid)
+                orig_in_data = np.dot(S_decomp[:, :n_use_in],
+                                      mm_full[:n_use_in])
+                resid -= np.dot(S_decomp, mm_full)
+                proc = out_meg_data if st_only else orig_data
+                _do_tSSS(proc, orig_in_data, resid, st_correlation, 1, t_str)
+        if not st_only or st_when == 'after':
+            mm_in = np.dot(pS_decomp[:n_use_in], orig_data)
+            if not st_only:
+                out_meg_data = np.dot(S_recon_sel, mm_in)
+            if st_when == 'after':
+                orig_in_data = np.dot(S_decomp[:, :n_use_in], mm_in)
+                resid -= np.dot(S_decomp[:, n_use_in:],
+                                np.dot(pS_decomp[n_use_in:], resid))
+                resid -= orig_in_data
+        if st_when == 'after':
+            _do_tSSS(out_meg_data, orig_in_data, resid, st_correlation,
+                     1, t_str)
+        raw_sss._data[meg_picks, start:stop] = out_meg_data
+
+    n_jobs = check_n_jobs(n_jobs)
+    if n_jobs > 1 and head_pos[0] is None and len(read_lims) > 2:
+        # Static head position: every window sees the same decomposition,
+        # so windows are independent. Threads suffice because the heavy
+        # BLAS products release the GIL, and each worker reads and writes
+        # a disjoint sample range of the raw data
+        t_strs = list()
+        for ii, (start, stop) in enumerate(zip(read_lims[:-1],
+                                               read_lims[1:])):
+            t_str = ('%8.3f - %8.3f sec'
+                     % tuple(raw_sss.times[[start, stop - 1]]))
+            t_str += ('(#%d/%d)'
+                      % (ii + 1, len(read_lims) - 1)).rjust(2 * n_sig + 5)
+            t_strs.append(t_str)
+        parallel, p_window, _ = parallel_func(
+            _process_static_window, n_jobs, max_nbytes=None,
+            backend='threading')
+        parallel(p_window(start, stop, t_str)
+                 for start, stop, t_str in zip(read_lims[:-1], read_lims[1:],
+                                               t_strs))
+        read_lims = read_lims[:1]  # all windows done, skip the serial loop
     for ii, (start, stop) in enumerate(zip(read_lims[:-1], read_lims[1:])):
         rel_times = raw_sss.times[start:stop]
         t_str = '%8.3f - %8.3f sec' % tuple(rel_times[[0, -1]])
@@ -431,18 +561,25 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
                   % (ii + 1, len(read_lims) - 1)).rjust(2 * n_sig + 5)
 
         # Get original data
-        orig_data = raw_sss._data[meg_picks[good_picks], start:stop]
-        # This could just be np.empty if not st_only, but shouldn't be slow
+        orig_data = np.take(raw_sss._data[:, start:stop], meg_picks_good,
+                            axis=0, out=orig_buf[:, :stop - start])
+        # This could just be scratch if not st_only, but shouldn't be slow
         # this way so might as well just always take the original data
-        out_meg_data = raw_sss._data[meg_picks, start:stop]
+        out_meg_data = np.take(raw_sss._data[:, start:stop], meg_picks,
+                               axis=0, out=out_meg_buf[:, :stop - start])
         # Apply cross-talk correction
         if cross_talk is not None:
             orig_data = ctc.dot(orig_data)
-        out_pos_data = np.empty((len(pos_picks), stop - start))
+        # No-ops at double precision; copies once per window in mixed mode
+        orig_data = orig_data.astype(proj_dtype, copy=False)
+        out_meg_data = out_meg_data.astype(proj_dtype, copy=False)
+        out_pos_data = quat_per_sample[:, start:stop]
 
         # Figure out which positions to use
         t_s_s_q_a = _trans_starts_stops_quats(head_pos, start, stop,
-                                              this_pos_quat)
+                                              this_pos_quat,
+                                              pos_bounds[ii],
+                                              pos_bounds[ii + 1])
         n_positions = len(t_s_s_q_a[0])
 
         # Set up post-tSSS or do pre-tSSS
@@ -450,22 +587,33 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
             # If doing tSSS before movecomp...
             resid = orig_data.copy()  # to be safe let's operate on a copy
             if st_when == 'after':
-                orig_in_data = np.empty((len(meg_picks), stop - start))
+                orig_in_data = np.empty((len(meg_picks), stop - start),
+                                        proj_dtype)
             else:  # 'before'
                 avg_trans = t_s_s_q_a[-1]
                 if avg_trans is not None:
                     # if doing movecomp
                     S_decomp_st, pS_decomp_st, _, n_use_in_st = \
                         _get_this_decomp_trans(avg_trans, t=rel_times[0])
+                    S_decomp_st = S_decomp_st.astype(proj_dtype, copy=False)
+                    pS_decomp_st = pS_decomp_st.astype(proj_dtype,
+                                                       copy=False)
                 else:
                     S_decomp_st, pS_decomp_st = S_decomp, pS_decomp
                     n_use_in_st = n_use_in
-                orig_in_data = np.dot(np.dot(S_decomp_st[:, :n_use_in_st],
-                                             pS_decomp_st[:n_use_in_st]),
-                                      resid)
-                resid -= np.dot(np.dot(S_decomp_st[:, n_use_in_st:],
-                                       pS_decomp_st[n_use_in_st:]), resid)
-                resid -= orig_in_data
+                # Right-associated products: S . (pS . resid) costs
+                # O(n_ch * n_moments * n_times) instead of the
+                # O(n_ch ** 2 * n_times) of the (S . pS) . resid order, and
+                # skips the (n_ch, n_ch) intermediate. The internal and
+                # external projections together span the full decomposition,
+                # so one product pair yields both the internal
+                # reconstruction and the residual in a single pass over the
+                # buffer
+                mm_full = np.dot(pS_decomp_st, resid)
+                orig_in_data = np.dot(S_decomp_st[:, :n_use_in_st],
+                                      mm_full[:n_use_in_st])
+                resid -= np.dot(S_decomp_st, mm_full)
+                del mm_full
                 # Here we operate on our actual data
                 proc = out_meg_data if st_only else orig_data
                 _do_tSSS(proc, orig_in_data, resid, st_correlation,
@@ -481,30 +629,46 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
                 if trans is not None:
                     S_decomp, pS_decomp, reg_moments, n_use_in = \
                         _get_this_decomp_trans(trans, t=rel_times[rel_start])
-
-                # Determine multipole moments for this interval
-                mm_in = np.dot(pS_decomp[:n_use_in],
-                               orig_data[:, rel_start:rel_stop])
-
-                # Our output data
-                if not st_only:
-                    out_meg_data[:, rel_start:rel_stop] = \
-                        np.dot(S_recon.take(reg_moments[:n_use_in], axis=1),
-                               mm_in)
-                if len(pos_picks) > 0:
-                    out_pos_data[:, rel_start:rel_stop] = \
-                        this_pos_quat[:, np.newaxis]
-
+                    S_decomp = S_decomp.astype(proj_dtype, copy=False)
+                    pS_decomp = pS_decomp.astype(proj_dtype, copy=False)
+                    S_recon_sel = np.ascontiguousarray(
+                        S_recon[:, reg_moments[:n_use_in]],
+                        dtype=proj_dtype)
+
+                # Determine multipole moments for this interval and
+                # project back, one bounded time block at a time
+                for t_a in range(rel_start, rel_stop, time_block):
+                    t_b = min(t_a + time_block, rel_stop)
+                    if t_b - t_a == time_block:  # scratch needs contiguity
+                        mm_in = np.dot(pS_decomp[:n_use_in],
+                                       orig_data[:, t_a:t_b],
+                                       out=mm_scratch[:n_use_in])
+                    else:
+                        mm_in = np.dot(pS_decomp[:n_use_in],
+                                       orig_data[:, t_a:t_b])
+
+                    # Our output data; route the GEMM into a reused
+                    # buffer wherever BLAS can write it directly
+                    if not st_only:
+                        out = out_meg_data[:, t_a:t_b]
+                        if out.flags['C_CONTIGUOUS']:
+                            np.dot(S_recon_sel, mm_in, out=out)
+                        elif t_b - t_a == time_block:
+                            np.dot(S_recon_sel, mm_in, out=recon_scratch)
+                            out[:] = recon_scratch
+                        else:  # short strided leftover, just allocate
+                            out[:] = np.dot(S_recon_sel, mm_in)
+                    if st_when == 'after':
+                        # Reconstruct data using original location from
+                        # internal space (external below)
+                        orig_in_data[:, t_a:t_b] = \
+                            np.dot(S_decomp[:, :n_use_in], mm_in)
                 # Transform orig_data to store just the residual
                 if st_when == 'after':
-                    # Reconstruct data using original location from external
-                    # and internal spaces and compute residual
                     rel_resid_data = resid[:, rel_start:rel_stop]
-                    orig_in_data[:, rel_start:rel_stop] = \
-                        np.dot(S_decomp[:, :n_use_in], mm_in)
-                    rel_resid_data -= np.dot(np.dot(S_decomp[:, n_use_in:],
-                                                    pS_decomp[n_use_in:]),
-                                             rel_resid_data)
+                    rel_resid_data -= np.dot(
+                        S_decomp[:, n_use_in:],
+                        np.dot(pS_decomp[n_use_in:], rel_resid_data))
                     rel_resid_data -= orig_in_data[:, rel_start:rel_stop]
 
         # If doing tSSS at the end
@@ -615,74 +779,75 @@ def _prep_mf_coils(info, ignore_ref=True):
 
     # Now coils is a sorted list of coils. Time to do some vectorization.
     n_coils = len(coils)
-    rmags = np.concatenate([coil['rmag'] for coil in coils])
-    cosmags = np.concatenate([coil['cosmag'] for coil in coils])
-    ws = np.concatenate([coil['w'] for coil in coils])
-    cosmags *= ws[:, np.newaxis]
-    del ws
     n_int = np.array([len(coil['rmag']) for coil in coils])
     bins = np.repeat(np.arange(len(n_int)), n_int)
     bd = np.concatenate(([0], np.cumsum(n_int)))
-    slice_map = dict((ii, slice(start, stop))
-                     for ii, (start, stop) in enumerate(zip(bd[:-1], bd[1:])))
-    return rmags, cosmags, bins, n_coils, mag_mask, slice_map
-
-
-def _trans_starts_stops_quats(pos, start, stop, this_pos_data):
+    # Write the integration points straight into flat structure-of-arrays
+    # blocks (one (n_points, 3) array each) so downstream basis
+    # computations see plain contiguous arrays; bd gives the per-coil
+    # block boundaries as bd[ii]:bd[ii + 1]
+    rmags = np.empty((bd[-1], 3))
+    cosmags = np.empty((bd[-1], 3))
+    for ii, coil in enumerate(coils):
+        rmags[bd[ii]:bd[ii + 1]] = coil['rmag']
+        # fold the integration weights in while writing, instead of a
+        # second full pass over the flat array
+        np.multiply(coil['cosmag'], coil['w'][:, np.newaxis],
+                    out=cosmags[bd[ii]:bd[ii + 1]])
+    return rmags, cosmags, bins, n_coils, mag_mask, bd
+
+
+def _trans_starts_stops_quats(pos, start, stop, this_pos_data,
+                              pos_lo, pos_hi):
     """Get all trans and limits we need."""
-    pos_idx = np.arange(*np.searchsorted(pos[1], [start, stop]))
-    used = np.zeros(stop - start, bool)
-    trans = list()
-    rel_starts = list()
-    rel_stops = list()
-    quats = list()
+    pos_idx = np.arange(pos_lo, pos_hi)
+    # Segment boundaries relative to the buffer: a leading segment that
+    # reuses the previous position (trans None), then one segment per
+    # position landing inside the window. quats stays a stacked
+    # (n_segments, 9) array so the averaging below needs no gather
+    bounds = np.concatenate(([0], pos[1][pos_idx] - start, [stop - start]))
+    if len(pos_idx) > 0:
+        trans = list(pos[0][pos_idx])
+        quats = pos[2][pos_idx]
+        if bounds[1] == 0:
+            # our first pos occurs on first time sample: no leading
+            # segment
+            bounds = bounds[1:]
+        else:
+            # don't calculate S_decomp for the leading segment, use the
+            # last one
+            trans.insert(0, None)  # meaning: use previous
+            quats = np.concatenate((this_pos_data[np.newaxis], quats))
+    else:  # no movement compensation (or no position in this window)
+        trans = [None]  # meaning: use previous
+        if this_pos_data is None:
+            quats = [None]
+        else:
+            quats = this_pos_data[np.newaxis]
+    rel_starts = bounds[:-1]
+    rel_stops = bounds[1:]
+    assert (rel_starts >= 0).all()
+    assert (rel_starts < rel_stops).all()  # pos[1] unique and ascending
+    assert rel_stops[-1] == stop - start
+    # Use weighted average for average trans over the window
     if this_pos_data is None:
         avg_trans = None
     else:
-        avg_trans = np.zeros(6)
-    for ti in range(-1, len(pos_idx)):
-        # first iteration for this block of data
-        if ti < 0:
-            rel_start = 0
-            rel_stop = pos[1][pos_idx[0]] if len(pos_idx) > 0 else stop
-            rel_stop = rel_stop - start
-            if rel_start == rel_stop:
-                continue  # our first pos occurs on first time sample
-            # Don't calculate S_decomp here, use the last one
-            trans.append(None)  # meaning: use previous
-            quats.append(this_pos_data)
-        else:
-            rel_start = pos[1][pos_idx[ti]] - start
-            if ti == len(pos_idx) - 1:
-                rel_stop = stop - start
-            else:
-                rel_stop = pos[1][pos_idx[ti + 1]] - start
-            trans.append(pos[0][pos_idx[ti]])
-            quats.append(pos[2][pos_idx[ti]])
-        assert 0 <= rel_start
-        assert rel_start < rel_stop
-        assert rel_stop <= stop - start
-        assert not used[rel_start:rel_stop].any()
-        used[rel_start:rel_stop] = True
-        rel_starts.append(rel_start)
-        rel_stops.append(rel_stop)
-        if this_pos_data is not None:
-            avg_trans += quats[-1][:6] * (rel_stop - rel_start)
-    assert used.all()
-    # Use weighted average for average trans over the window
-    if avg_trans is not None:
-        avg_trans /= (stop - start)
-        avg_trans = np.vstack([
-            np.hstack([quat_to_rot(avg_trans[:3]),
-                       avg_trans[3:][:, np.newaxis]]),
-            [[0., 0., 0., 1.]]])
+        avg_quat = np.dot(rel_stops - rel_starts, quats[:, :6])
+        avg_quat /= (stop - start)
+        # fill the 4x4 directly instead of stacking temporaries
+        avg_trans = np.zeros((4, 4))
+        avg_trans[3, 3] = 1.
+        avg_trans[:3, :3] = quat_to_rot(avg_quat[:3])
+        avg_trans[:3, 3] = avg_quat[3:]
     return trans, rel_starts, rel_stops, quats, avg_trans
 
 
 def _do_tSSS(clean_data, orig_in_data, resid, st_correlation,
              n_positions, t_str):
     """Compute and apply SSP-like projection vectors based on min corr."""
-    np.asarray_chkfinite(resid)
+    if __debug__:  # O(N) finite check, skipped under python -O
+        np.asarray_chkfinite(resid)
     t_proj = _overlap_projector(orig_in_data, resid, st_correlation)
     # Apply projector according to Eq. 12 in [2]_
     msg = ('        Projecting %2d intersecting tSSS components '
@@ -690,7 +855,17 @@ def _do_tSSS(clean_data, orig_in_data, resid, st_correlation,
     if n_positions > 1:
         msg += ' (across %2d positions)' % n_positions
     logger.info(msg)
-    clean_data -= np.dot(np.dot(clean_data, t_proj), t_proj.T)
+    if clean_data.flags['C_CONTIGUOUS']:
+        # rank-k BLAS update on the transposed (Fortran-order) view:
+        # no full-size correction matrix to materialize and subtract
+        gemm, = linalg.get_blas_funcs(('gemm',), (clean_data, t_proj))
+        out = gemm(-1.0, t_proj, np.dot(clean_data, t_proj).T, 1.0,
+                   clean_data.T, overwrite_c=True)
+        if out.__array_interface__['data'][0] != \
+                clean_data.__array_interface__['data'][0]:
+            clean_data[:] = out.T  # BLAS made a copy after all
+    else:
+        clean_data -= np.dot(np.dot(clean_data, t_proj), t_proj.T)
 
 
 def _copy_preload_add_channels(raw, add_channels):
@@ -701,7 +876,11 @@ def _copy_preload_add_channels(raw, add_channels):
                  FIFF.FIFFV_QUAT_4, FIFF.FIFFV_QUAT_5, FIFF.FIFFV_QUAT_6,
                  FIFF.FIFFV_HPI_G, FIFF.FIFFV_HPI_ERR, FIFF.FIFFV_HPI_MOV]
         out_shape = (len(raw.ch_names) + len(kinds), len(raw.times))
-        out_data = np.zeros(out_shape, np.float64)
+        # don't zero the whole (n_chan, n_times) block -- the original
+        # channels are about to be overwritten anyway, so only the
+        # appended cHPI rows need filling
+        out_data = np.empty(out_shape, np.float64)
+        out_data[len(raw.ch_names):].fill(0.)
         msg = '    Appending head position result channels and '
         if raw.preload:
             logger.info(msg + 'copying original raw data')
@@ -773,14 +952,14 @@ def _check_pos(pos, head_frame, raw, st_fixed, sfreq):
 
 def _get_decomp(trans, all_coils, cal, regularize, exp, ignore_ref,
                 coil_scale, grad_picks, mag_picks, good_picks, mag_or_fine,
-                bad_condition, t, mag_scale):
+                bad_condition, t, mag_scale, basis_scratch=None):
     """Get a decomposition matrix and pseudoinverse matrices."""
     #
     # Fine calibration processing (point-like magnetometers and calib. coeffs)
     #
     S_decomp = _get_s_decomp(exp, all_coils, trans, coil_scale, cal,
                              ignore_ref, grad_picks, mag_picks, good_picks,
-                             mag_scale)
+                             mag_scale, basis_scratch)
 
     #
     # Regularization
@@ -788,9 +967,11 @@ def _get_decomp(trans, all_coils, cal, regularize, exp, ignore_ref,
     S_decomp, pS_decomp, sing, reg_moments, n_use_in = _regularize(
         regularize, exp, S_decomp, mag_or_fine, t=t)
 
-    # Pseudo-inverse of total multipolar moment basis set (Part of Eq. 37)
+    # Pseudo-inverse of total multipolar moment basis set (Part of Eq. 37).
+    # The singular values are already in hand from the pinv SVD, so the
+    # condition ratio costs nothing extra; let the logger defer formatting
     cond = sing[0] / sing[-1]
-    logger.debug('    Decomposition matrix condition: %0.1f' % cond)
+    logger.debug('    Decomposition matrix condition: %0.1f', cond)
     if bad_condition != 'ignore' and cond >= 1000.:
         msg = 'Matrix is badly conditioned: %0.0f >= 1000' % cond
         if bad_condition == 'error':
@@ -798,16 +979,19 @@ def _get_decomp(trans, all_coils, cal, regularize, exp, ignore_ref,
         else:  # condition == 'warning':
             warn(msg)
 
-    # Build in our data scaling here
+    # Build in our data scaling here; multiplying by the reciprocal beats
+    # broadcasting a divide over the basis on every position change
     pS_decomp *= coil_scale[good_picks].T
-    S_decomp /= coil_scale[good_picks]
+    S_decomp *= 1. / coil_scale[good_picks]
     return S_decomp, pS_decomp, reg_moments, n_use_in
 
 
 def _get_s_decomp(exp, all_coils, trans, coil_scale, cal, ignore_ref,
-                  grad_picks, mag_picks, good_picks, mag_scale):
+                  grad_picks, mag_picks, good_picks, mag_scale,
+                  basis_scratch=None):
     """Get S_decomp."""
-    S_decomp = _trans_sss_basis(exp, all_coils, trans, coil_scale)
+    S_decomp = _trans_sss_basis(exp, all_coils, trans, coil_scale,
+                                out=basis_scratch)
     if cal is not None:
         # Compute point-like mags to incorporate gradiometer imbalance
         grad_cals = _sss_basis_point(exp, trans, cal, ignore_ref, mag_scale)
@@ -836,13 +1020,15 @@ def _regularize(regularize, exp, S_decomp, mag_or_fine, t, verbose=None):
     else:
         in_removes = []
         out_removes = _regularize_out(int_order, ext_order, mag_or_fine)
-    reg_in_moments = np.setdiff1d(np.arange(n_in), in_removes)
-    reg_out_moments = np.setdiff1d(np.arange(n_in, n_in + n_out),
-                                   out_removes)
-    n_use_in = len(reg_in_moments)
-    n_use_out = len(reg_out_moments)
-    reg_moments = np.concatenate((reg_in_moments, reg_out_moments))
-    S_decomp = S_decomp.take(reg_moments, axis=1)
+    # One boolean keep-mask pass instead of setdiff1d's sort/unique per
+    # space, and a single contiguous gather of the kept columns
+    keep = np.ones(n_in + n_out, bool)
+    keep[in_removes] = False
+    keep[out_removes] = False
+    reg_moments = np.where(keep)[0]
+    n_use_in = int(keep[:n_in].sum())
+    n_use_out = len(reg_moments) - n_use_in
+    S_decomp = S_decomp[:, keep]
     pS_decomp, sing = _col_norm_pinv(S_decomp.copy())
     if regularize is not None or n_use_out != n_out:
         logger.info('        Using %s/%s harmonic components for %s  '
@@ -865,7 +1051,11 @@ def _get_mf_picks(info, int_order, ext_order, ignore_ref=False):
     meg_picks = pick_types(info, meg=True, ref_meg=ref, exclude=[])
     meg_info = pick_info(info, meg_picks)
     del info
-    good_picks = pick_types(meg_info, meg=True, ref_meg=ref, exclude='bads')
+    # meg_info holds exactly the meg_picks channels, so the good subset is
+    # just the non-bad rows; no need for another pick_types walk over the
+    # channel dicts
+    good_picks = np.where(np.in1d(meg_info['ch_names'], meg_info['bads'],
+                                  invert=True))[0]
     n_bases = _get_n_moments([int_order, ext_order]).sum()
     if n_bases > len(good_picks):
         raise ValueError('Number of requested bases (%s) exceeds number of '
@@ -886,8 +1076,9 @@ def _get_mf_picks(info, int_order, ext_order, ignore_ref=False):
     # KIT gradiometers are marked as having units T, not T/M (argh)
     # We need a separate variable for this because KIT grads should be
     # treated mostly like magnetometers (e.g., scaled by 100) for reg
-    mag_or_fine[np.array([ch['coil_type'] & 0xFFFF == FIFF.FIFFV_COIL_KIT_GRAD
-                          for ch in meg_info['chs']], bool)] = False
+    coil_types = np.fromiter((ch['coil_type'] for ch in meg_info['chs']),
+                             count=len(meg_info['chs']), dtype=np.int64)
+    mag_or_fine[(coil_types & 0xFFFF) == FIFF.FIFFV_COIL_KIT_GRAD] = False
     msg = ('    Processing %s gradiometers and %s magnetometers'
            % (len(grad_picks), len(mag_picks)))
     n_kit = len(mag_picks) - mag_or_fine.sum()
@@ -924,8 +1115,11 @@ def _col_norm_pinv(x):
     x /= norm
     u, s, v = linalg.svd(x, full_matrices=False, overwrite_a=True,
                          **check_disable)
+    # fold both scalings into v in place so the GEMM runs on views with
+    # no (n, k) temporary
     v /= norm
-    return np.dot(v.T * 1. / s, u.T), s
+    v *= (1. / s)[:, np.newaxis]
+    return np.dot(v.T, u.T), s
 
 
 def _sq(x):
@@ -939,26 +1133,35 @@ def _check_finite(data):
         raise RuntimeError('data contains non-finite numbers')
 
 
+_sph_harm_norms = dict()
+
+
 def _sph_harm_norm(order, degree):
-    """Normalization factor for spherical harmonics."""
+    """Normalization factor for spherical harmonics (memoized)."""
     # we could use scipy.special.poch(degree + order + 1, -2 * order)
-    # here, but it's slower for our fairly small degree
-    norm = np.sqrt((2 * degree + 1.) / (4 * np.pi))
-    if order != 0:
-        norm *= np.sqrt(factorial(degree - order) /
-                        float(factorial(degree + order)))
+    # here, but it's slower for our fairly small degree; the factorial
+    # arithmetic is done once per (order, degree) and then looked up
+    key = (order, degree)
+    norm = _sph_harm_norms.get(key)
+    if norm is None:
+        norm = np.sqrt((2 * degree + 1.) / (4 * np.pi))
+        if order != 0:
+            norm *= np.sqrt(factorial(degree - order) /
+                            float(factorial(degree + order)))
+        _sph_harm_norms[key] = norm
     return norm
 
 
 def _concatenate_sph_coils(coils):
     """Concatenate MEG coil parameters for spherical harmoncs."""
+    n_int = np.array([len(coil['rmag']) for coil in coils])
     rs = np.concatenate([coil['r0_exey'] for coil in coils])
     wcoils = np.concatenate([coil['w'] for coil in coils])
-    ezs = np.concatenate([np.tile(coil['ez'][np.newaxis, :],
-                                  (len(coil['rmag']), 1))
-                          for coil in coils])
-    bins = np.repeat(np.arange(len(coils)),
-                     [len(coil['rmag']) for coil in coils])
+    # one repeat over a stacked (n_coils, 3) array rather than
+    # allocating a tiled copy per coil
+    ezs = np.repeat(np.array([coil['ez'] for coil in coils]),
+                    n_int, axis=0)
+    bins = np.repeat(np.arange(len(coils)), n_int)
     return rs, wcoils, ezs, bins
 
 
@@ -967,8 +1170,9 @@ _mu_0 = 4e-7 * np.pi  # magnetic permeability
 
 def _get_mag_mask(coils):
     """Get the coil_scale for Maxwell filtering."""
-    return np.array([coil['coil_class'] == FIFF.FWD_COILC_MAG
-                     for coil in coils])
+    coil_classes = np.fromiter((coil['coil_class'] for coil in coils),
+                               count=len(coils), dtype=np.int64)
+    return coil_classes == FIFF.FWD_COILC_MAG
 
 
 def _sss_basis_basic(exp, coils, mag_scale=100., method='standard'):
@@ -983,6 +1187,7 @@ def _sss_basis_basic(exp, coils, mag_scale=100., method='standard'):
         # Convert points to spherical coordinates
         rad, az, pol = _cart_to_sph(rmags).T
         cosmags *= ws[:, np.newaxis]
+        L = _tabular_legendre(rmags, max(int_order, ext_order))
         del rmags, ws
         out_type = np.float64
     else:  # testing equivalence method
@@ -990,6 +1195,7 @@ def _sss_basis_basic(exp, coils, mag_scale=100., method='standard'):
         rs -= origin
         rad, az, pol = _cart_to_sph(rs).T
         ezs *= wcoils[:, np.newaxis]
+        L = _tabular_legendre(rs, max(int_order, ext_order))
         del rs, wcoils
         out_type = np.complex128
     del origin
@@ -1001,6 +1207,7 @@ def _sss_basis_basic(exp, coils, mag_scale=100., method='standard'):
     S_out = S_tot[:, n_in:]
     coil_scale = np.ones((len(coils), 1))
     coil_scale[_get_mag_mask(coils)] = mag_scale
+    cos_pol, sin_pol = np.cos(pol), np.sin(pol)
 
     # Compute internal/external basis vectors (exclude degree 0; L/RHS Eq. 5)
     for degree in range(1, max(int_order, ext_order) + 1):
@@ -1017,8 +1224,9 @@ def _sss_basis_basic(exp, coils, mag_scale=100., method='standard'):
             # is obtained by taking the partial derivative of Eq. 4 w.r.t. each
             # coordinate.
             az_factor = 1j * order * sph / np.sin(np.maximum(pol, 1e-16))
-            pol_factor = (-sph_norm * np.sin(pol) * np.exp(1j * order * az) *
-                          _alegendre_deriv(order, degree, np.cos(pol)))
+            pol_factor = (-sph_norm * sin_pol * np.exp(1j * order * az) *
+                          _tabular_alegendre_deriv(order, degree, cos_pol,
+                                                   sin_pol, L))
             if degree <= int_order:
                 S_in_out.append(S_in)
                 in_norm = _mu_0 * rad ** -(degree + 2)
@@ -1050,11 +1258,11 @@ def _sss_basis_basic(exp, coils, mag_scale=100., method='standard'):
                         orders_pos_neg.append(-order)
                     for gr, oo in zip(grads_pos_neg, orders_pos_neg):
                         # Gradients dotted w/integration point weighted normals
-                        gr = np.einsum('ij,ij->i', gr, cosmags)
+                        gr = (gr * cosmags).sum(axis=1)
                         vals = np.bincount(bins, gr, len(coils))
                         spc[:, _deg_ord_idx(degree, oo)] = -vals
                 else:
-                    grads = np.einsum('ij,ij->i', grads, ezs)
+                    grads = (grads * ezs).sum(axis=1)
                     v = (np.bincount(bins, grads.real, len(coils)) +
                          1j * np.bincount(bins, grads.imag, len(coils)))
                     spc[:, _deg_ord_idx(degree, order)] = -v
@@ -1071,7 +1279,7 @@ def _sss_basis_basic(exp, coils, mag_scale=100., method='standard'):
     return S_tot
 
 
-def _sss_basis(exp, all_coils):
+def _sss_basis(exp, all_coils, out=None, dtype=np.float64):
     """Compute SSS basis for given conditions.
 
     Parameters
@@ -1091,6 +1299,15 @@ def _sss_basis(exp, all_coils):
         position, normals, weights, number of integration points and channel
         type. All coil geometry must be in the same coordinate frame
         as ``origin`` (``head`` or ``meg``).
+    out : ndarray, shape (n_coils, n_mult_moments) | None
+        Array to write the basis into. Callers that evaluate the basis
+        repeatedly (e.g., once per head position) can pass the same array
+        each time to avoid reallocating it.
+    dtype : dtype
+        Dtype of the output basis (np.float64 or np.float32). The columns
+        are computed in double precision regardless; np.float32 only
+        rounds the stored basis, halving its memory traffic for callers
+        that project single-precision data. Ignored if ``out`` is given.
 
     Returns
     -------
@@ -1106,7 +1323,11 @@ def _sss_basis(exp, all_coils):
     rmags, cosmags, bins, n_coils = all_coils[:4]
     int_order, ext_order = exp['int_order'], exp['ext_order']
     n_in, n_out = _get_n_moments([int_order, ext_order])
-    S_tot = np.empty((n_coils, n_in + n_out), np.float64)
+    if out is None:
+        S_tot = np.empty((n_coils, n_in + n_out), dtype)
+    else:
+        assert out.shape == (n_coils, n_in + n_out)
+        S_tot = out
 
     rmags = rmags - exp['origin']
     S_in = S_tot[:, :n_in]
@@ -1126,90 +1347,94 @@ def _sss_basis(exp, all_coils):
     cos_az[z_only] = 1.
     sin_az = rmags[:, 1] / r_xy  # sin(phi)
     sin_az[z_only] = 0.
+    # fold the pole handling into the operands once -- zero the azimuthal
+    # numerators at the pole and make the sine denominator safe there --
+    # instead of a masked store per (degree, order) below
+    az_mask = (~z_only).astype(np.float64)
+    sin_pol_safe = np.where(z_only, 1., sin_pol)
     del rmags
+    # Hoist the azimuthal trig terms (the dominant transcendental cost of
+    # the nested loops below) into per-order tables computed in one shot
+    orders_1d = np.arange(1, max_order + 1)
+    sin_orders = np.sin(orders_1d[:, np.newaxis] * phi)
+    cos_orders = np.cos(orders_1d[:, np.newaxis] * phi)
+    del phi
     # Appropriate vector spherical harmonics terms
     #  JNE 2012-02-08: modified alm -> 2*alm, blm -> -2*blm
     r_nn2 = r_n.copy()
     r_nn1 = 1.0 / (r_n * r_n)
-    for degree in range(max_order + 1):
+    for degree, (mult, idx, order_rows) in enumerate(
+            _basis_schedule(max_order)):
         if degree <= ext_order:
             r_nn1 *= r_n  # r^(l-1)
         if degree <= int_order:
             r_nn2 *= r_n  # r^(l+2)
-
-        # mu_0*sqrt((2l+1)/4pi (l-m)!/(l+m)!)
-        mult = 2e-7 * np.sqrt((2 * degree + 1) * np.pi)
+            # denominators shared by every order within this degree
+            sp_r_nn2 = sin_pol_safe * r_nn2
+            t2_r_nn2 = 2 * r_nn2
 
         if degree > 0:
-            idx = _deg_ord_idx(degree, 0)
             # alpha
             if degree <= int_order:
-                b_r = mult * (degree + 1) * L[degree][0] / r_nn2
-                b_pol = -mult * L[degree][1] / r_nn2
+                b_r = mult * (degree + 1) * L[degree, 0] / r_nn2
+                b_pol = -mult * L[degree, 1] / r_nn2
                 S_in[:, idx] = _integrate_points(
                     cos_az, sin_az, cos_pol, sin_pol, b_r, 0., b_pol,
                     cosmags, bins, n_coils)
             # beta
             if degree <= ext_order:
-                b_r = -mult * degree * L[degree][0] * r_nn1
-                b_pol = -mult * L[degree][1] * r_nn1
+                b_r = -mult * degree * L[degree, 0] * r_nn1
+                b_pol = -mult * L[degree, 1] * r_nn1
                 S_out[:, idx] = _integrate_points(
                     cos_az, sin_az, cos_pol, sin_pol, b_r, 0., b_pol,
                     cosmags, bins, n_coils)
-        for order in range(1, degree + 1):
-            ord_phi = order * phi
-            sin_order = np.sin(ord_phi)
-            cos_order = np.cos(ord_phi)
-            mult /= np.sqrt((degree - order + 1) * (degree + order))
-            factor = mult * np.sqrt(2)  # equivalence fix (Elekta uses 2.)
+        for order, factor, idx_pos, idx_neg in order_rows:
+            sin_order = sin_orders[order - 1]
+            cos_order = cos_orders[order - 1]
 
             # Real
-            idx = _deg_ord_idx(degree, order)
-            r_fact = factor * L[degree][order] * cos_order
-            az_fact = factor * order * sin_order * L[degree][order]
-            pol_fact = -factor * (L[degree][order + 1] -
+            idx = idx_pos
+            r_fact = factor * L[degree, order] * cos_order
+            az_fact = factor * order * sin_order * L[degree, order]
+            pol_fact = -factor * (L[degree, order + 1] -
                                   (degree + order) * (degree - order + 1) *
-                                  L[degree][order - 1]) * cos_order
+                                  L[degree, order - 1]) * cos_order
             # alpha
             if degree <= int_order:
                 b_r = (degree + 1) * r_fact / r_nn2
-                b_az = az_fact / (sin_pol * r_nn2)
-                b_az[z_only] = 0.
-                b_pol = pol_fact / (2 * r_nn2)
+                b_az = az_fact * az_mask / sp_r_nn2
+                b_pol = pol_fact / t2_r_nn2
                 S_in[:, idx] = _integrate_points(
                     cos_az, sin_az, cos_pol, sin_pol, b_r, b_az, b_pol,
                     cosmags, bins, n_coils)
             # beta
             if degree <= ext_order:
                 b_r = -degree * r_fact * r_nn1
-                b_az = az_fact * r_nn1 / sin_pol
-                b_az[z_only] = 0.
+                b_az = az_fact * az_mask * r_nn1 / sin_pol_safe
                 b_pol = pol_fact * r_nn1 / 2.
                 S_out[:, idx] = _integrate_points(
                     cos_az, sin_az, cos_pol, sin_pol, b_r, b_az, b_pol,
                     cosmags, bins, n_coils)
 
             # Imaginary
-            idx = _deg_ord_idx(degree, -order)
-            r_fact = factor * L[degree][order] * sin_order
-            az_fact = factor * order * cos_order * L[degree][order]
-            pol_fact = factor * (L[degree][order + 1] -
+            idx = idx_neg
+            r_fact = factor * L[degree, order] * sin_order
+            az_fact = factor * order * cos_order * L[degree, order]
+            pol_fact = factor * (L[degree, order + 1] -
                                  (degree + order) * (degree - order + 1) *
-                                 L[degree][order - 1]) * sin_order
+                                 L[degree, order - 1]) * sin_order
             # alpha
             if degree <= int_order:
                 b_r = -(degree + 1) * r_fact / r_nn2
-                b_az = az_fact / (sin_pol * r_nn2)
-                b_az[z_only] = 0.
-                b_pol = pol_fact / (2 * r_nn2)
+                b_az = az_fact * az_mask / sp_r_nn2
+                b_pol = pol_fact / t2_r_nn2
                 S_in[:, idx] = _integrate_points(
                     cos_az, sin_az, cos_pol, sin_pol, b_r, b_az, b_pol,
                     cosmags, bins, n_coils)
             # beta
             if degree <= ext_order:
                 b_r = degree * r_fact * r_nn1
-                b_az = az_fact * r_nn1 / sin_pol
-                b_az[z_only] = 0.
+                b_az = az_fact * az_mask * r_nn1 / sin_pol_safe
                 b_pol = pol_fact * r_nn1 / 2.
                 S_out[:, idx] = _integrate_points(
                     cos_az, sin_az, cos_pol, sin_pol, b_r, b_az, b_pol,
@@ -1220,34 +1445,75 @@ def _sss_basis(exp, all_coils):
 def _integrate_points(cos_az, sin_az, cos_pol, sin_pol, b_r, b_az, b_pol,
                       cosmags, bins, n_coils):
     """Integrate points in spherical coords."""
-    grads = _sp_to_cart(cos_az, sin_az, cos_pol, sin_pol, b_r, b_az, b_pol).T
-    grads = np.einsum('ij,ij->i', grads, cosmags)
-    return np.bincount(bins, grads, n_coils)
+    # Fused spherical-to-cartesian conversion (see _sp_to_cart) and
+    # row-wise dot product: no (3, n_points) stack, transpose copy, or
+    # einsum dispatch on this memory-bound path
+    vals = ((sin_pol * cos_az * b_r +
+             cos_pol * cos_az * b_pol - sin_az * b_az) * cosmags[:, 0] +
+            (sin_pol * sin_az * b_r +
+             cos_pol * sin_az * b_pol + cos_az * b_az) * cosmags[:, 1] +
+            (cos_pol * b_r - sin_pol * b_pol) * cosmags[:, 2])
+    # bins is sorted by construction (see _prep_mf_coils), so these adds
+    # are already sequential writes; a segmented np.add.reduceat over the
+    # bd boundaries is no faster here and its pairwise summation order
+    # perturbs marginal regularization decisions
+    return np.bincount(bins, vals, n_coils)
+
+
+_basis_schedules = dict()
+
+
+def _basis_schedule(max_order):
+    """Get the per-(degree, order) scalar constants for _sss_basis.
+
+    The normalization constants and output column indices depend only on
+    ``max_order``, which stays fixed across the many basis evaluations of
+    a movement-compensated run, so the schedule is computed once and
+    memoized.
+    """
+    if max_order not in _basis_schedules:
+        schedule = list()
+        for degree in range(max_order + 1):
+            # mu_0*sqrt((2l+1)/4pi (l-m)!/(l+m)!)
+            mult = 2e-7 * np.sqrt((2 * degree + 1) * np.pi)
+            idx = _deg_ord_idx(degree, 0) if degree > 0 else None
+            order_rows = list()
+            this_mult = mult
+            for order in range(1, degree + 1):
+                this_mult /= np.sqrt((degree - order + 1) * (degree + order))
+                # equivalence fix (Elekta uses 2.)
+                factor = this_mult * np.sqrt(2)
+                order_rows.append((order, factor,
+                                   _deg_ord_idx(degree, order),
+                                   _deg_ord_idx(degree, -order)))
+            schedule.append((mult, idx, tuple(order_rows)))
+        _basis_schedules[max_order] = tuple(schedule)
+    return _basis_schedules[max_order]
 
 
 def _tabular_legendre(r, nind):
     """Compute associated Legendre polynomials."""
     r_n = np.sqrt(np.sum(r * r, axis=1))
     x = r[:, 2] / r_n  # cos(theta)
-    L = list()
-    for degree in range(nind + 1):
-        L.append(np.zeros((degree + 2, len(r))))
-    L[0][0] = 1.
+    # one contiguous (degree, order, point) block rather than a ragged
+    # list of per-degree arrays
+    L = np.zeros((nind + 1, nind + 2, len(r)))
+    L[0, 0] = 1.
     pnn = 1.
     fact = 1.
     sx2 = np.sqrt((1. - x) * (1. + x))
     for degree in range(nind + 1):
-        L[degree][degree] = pnn
+        L[degree, degree] = pnn
         pnn *= (-fact * sx2)
         fact += 2.
         if degree < nind:
-            L[degree + 1][degree] = x * (2 * degree + 1) * L[degree][degree]
+            L[degree + 1, degree] = x * (2 * degree + 1) * L[degree, degree]
         if degree >= 2:
             for order in range(degree - 1):
-                L[degree][order] = (x * (2 * degree - 1) *
-                                    L[degree - 1][order] -
+                L[degree, order] = (x * (2 * degree - 1) *
+                                    L[degree - 1, order] -
                                     (degree + order - 1) *
-                                    L[degree - 2][order]) / (degree - order)
+                                    L[degree - 2, order]) / (degree - order)
     return L
 
 
@@ -1262,18 +1528,11 @@ def _sp_to_cart(cos_az, sin_az, cos_pol, sin_pol, b_r, b_az, b_pol):
 
 def _get_degrees_orders(order):
     """Get the set of degrees used in our basis functions."""
-    degrees = np.zeros(_get_n_moments(order), int)
-    orders = np.zeros_like(degrees)
-    for degree in range(1, order + 1):
-        # Only loop over positive orders, negative orders are handled
-        # for efficiency within
-        for order in range(degree + 1):
-            ii = _deg_ord_idx(degree, order)
-            degrees[ii] = degree
-            orders[ii] = order
-            ii = _deg_ord_idx(degree, -order)
-            degrees[ii] = degree
-            orders[ii] = -order
+    # invert _deg_ord_idx in one shot: each degree l fills the 2l + 1
+    # consecutive indices l**2 - 1 ... l**2 + 2l - 1
+    degrees = np.repeat(np.arange(1, order + 1),
+                        2 * np.arange(1, order + 1) + 1)
+    orders = np.arange(len(degrees)) + 1 - degrees * degrees - degrees
     return degrees, orders
 
 
@@ -1301,6 +1560,23 @@ def _alegendre_deriv(order, degree, val):
             lpmv(order - 1, degree, val)) / (1. - val * val)
 
 
+def _tabular_alegendre_deriv(order, degree, x, sin_x, L):
+    """Evaluate the associated Legendre derivative from a precomputed table.
+
+    Same three-term identity as :func:`_alegendre_deriv`, but with the
+    ``lpmv`` calls replaced by lookups into a table from
+    :func:`_tabular_legendre`, which computes the whole recurrence once.
+    """
+    assert order >= 0
+    if order == 0:
+        # lpmv(-1, degree, x) via P_l^-1 = -P_l^1 / (l * (l + 1))
+        lpmm1 = -L[degree, 1] / (degree * (degree + 1.))
+    else:
+        lpmm1 = L[degree, order - 1]
+    return (order * x * L[degree, order] + (degree + order) *
+            (degree - order + 1.) * sin_x * lpmm1) / (1. - x * x)
+
+
 def _bases_complex_to_real(complex_tot, int_order, ext_order):
     """Convert complex spherical harmonics to real."""
     n_in, n_out = _get_n_moments([int_order, ext_order])
@@ -1393,11 +1669,12 @@ def _update_sss_info(raw, origin, int_order, ext_order, nchan, coord_frame,
     """
     n_in, n_out = _get_n_moments([int_order, ext_order])
     raw.info['maxshield'] = False
-    components = np.zeros(n_in + n_out).astype('int32')
+    components = np.zeros(n_in + n_out, np.int32)
     components[reg_moments] = 1
     sss_info_dict = dict(in_order=int_order, out_order=ext_order,
                          nchan=nchan, origin=origin.astype('float32'),
-                         job=np.array([2]), nfree=np.sum(components[:n_in]),
+                         job=np.array([2], np.int32),
+                         nfree=np.sum(components[:n_in]),
                          frame=_str_to_frame[coord_frame],
                          components=components)
     max_info_dict = dict(max_st=max_st)
@@ -1418,8 +1695,8 @@ def _update_sss_info(raw, origin, int_order, ext_order, nchan, coord_frame,
 def _reset_meg_bads(info):
     """Reset MEG bads."""
     meg_picks = pick_types(info, meg=True, exclude=[])
-    info['bads'] = [bad for bad in info['bads']
-                    if info['ch_names'].index(bad) not in meg_picks]
+    meg_names = set(info['ch_names'][pick] for pick in meg_picks)
+    info['bads'] = [bad for bad in info['bads'] if bad not in meg_names]
 
 
 check_disable = dict()  # not available on really old versions of SciPy
@@ -1429,13 +1706,22 @@ if 'check_finite' in _get_args(linalg.svd):
 
 def _orth_overwrite(A):
     """Create a slightly more efficient 'orth'."""
-    # adapted from scipy/linalg/decomp_svd.py
-    u, s = _safe_svd(A, full_matrices=False, **check_disable)[:2]
+    # Column-pivoted QR reveals the numerical rank like the SVD-based
+    # scipy orth (|R[0, 0]| stands in for the largest singular value),
+    # with one decomposition instead of two
     M, N = A.shape
-    eps = np.finfo(float).eps
-    tol = max(M, N) * np.amax(s) * eps
-    num = np.sum(s > tol, dtype=int)
-    return u[:, :num]
+    # rank tolerance must scale with the input dtype's rounding (cf.
+    # scipy.linalg.orth): float32 inputs (precision='mixed') have noise
+    # floors ~1e9 times higher than float64's eps
+    eps = np.finfo(A.dtype).eps
+    Q, R = linalg.qr(A, mode='economic', pivoting=True, overwrite_a=True,
+                     **check_disable)[:2]
+    tol = max(M, N) * abs(R[0, 0]) * eps
+    # pivoting makes |diag(R)| non-increasing, so the rank is just where
+    # it crosses tol
+    d = np.abs(np.diag(R))
+    num = int(np.searchsorted(-d, -tol))
+    return Q[:, :num]
 
 
 def _overlap_projector(data_int, data_res, corr):
@@ -1453,28 +1739,32 @@ def _overlap_projector(data_int, data_res, corr):
     # computation
 
     # we use np.linalg.norm instead of sp.linalg.norm here: ~2x faster!
+    # _orth_overwrite's pivoted QR already yields orthonormal columns, so
+    # no re-orthogonalizing QR pass is needed on its output. The two
+    # factorizations cannot be fused into one stacked QR: that would
+    # orthogonalize the residual block against the internal one, and the
+    # intersection test needs the two bases computed independently
     n = np.linalg.norm(data_int)
-    Q_int = linalg.qr(_orth_overwrite((data_int / n).T),
-                      overwrite_a=True, mode='economic', **check_disable)[0].T
+    Q_int = _orth_overwrite((data_int / n).T).T
     n = np.linalg.norm(data_res)
-    Q_res = linalg.qr(_orth_overwrite((data_res / n).T),
-                      overwrite_a=True, mode='economic', **check_disable)[0]
+    Q_res = _orth_overwrite((data_res / n).T)
     assert data_int.shape[1] > 0
     C_mat = np.dot(Q_int, Q_res)
     del Q_int
 
-    # Compute angles between subspace and which bases to keep
-    S_intersect, Vh_intersect = linalg.svd(C_mat, overwrite_a=True,
-                                           full_matrices=False,
-                                           **check_disable)[1:]
+    # Compute angles between subspace and which bases to keep. Only the
+    # correlations and right singular vectors are needed, so diagonalize
+    # the small C^T C instead of taking a full SVD: the symmetric solver
+    # is cheaper than gesdd and skips computing U entirely
+    w, V = linalg.eigh(np.dot(C_mat.T, C_mat), **check_disable)
     del C_mat
-    intersect_mask = (S_intersect >= corr)
-    del S_intersect
+    # eigh returns ascending eigenvalues (squared correlations)
+    intersect_mask = (w[::-1] >= corr * corr)
 
     # Compute projection operator as (I-LL_T) Eq. 12 in [2]_
     # V_principal should be shape (n_time_pts x n_retained_inds)
-    Vh_intersect = Vh_intersect[intersect_mask].T
-    V_principal = np.dot(Q_res, Vh_intersect)
+    V_intersect = V[:, ::-1][:, intersect_mask]
+    V_principal = np.dot(Q_res, V_intersect)
     return V_principal
 
 
@@ -1506,6 +1796,15 @@ def _read_fine_cal(fine_cal):
     return cal_chs, cal_ch_numbers
 
 
+def _loc_to_coil_rots(locs):
+    """Extract (N, 3, 3) coil rotations from an (N, 12) loc array.
+
+    Batched equivalent of ``_loc_to_coil_trans(loc)[:3, :3]``: the
+    returned matrices have EX/EY/EZ as columns. The result is a view.
+    """
+    return locs[:, 3:].reshape(-1, 3, 3).transpose(0, 2, 1)
+
+
 def _update_sensor_geometry(info, fine_cal, ignore_ref):
     """Replace sensor geometry information and reorder cal_chs."""
     from ._fine_cal import read_fine_calibration
@@ -1524,10 +1823,13 @@ def _update_sensor_geometry(info, fine_cal, ignore_ref):
             % sorted(list(set(ch_names[pick] for pick in meg_picks) -
                           set(fine_cal['ch_names']))))
     rev_order = np.argsort(info_order)
+    # all of these pick lists are unique, so skip in1d's dedup pass
     rev_grad = rev_order[np.in1d(meg_picks,
-                                 pick_types(info, meg='grad', exclude=()))]
+                                 pick_types(info, meg='grad', exclude=()),
+                                 assume_unique=True)]
     rev_mag = rev_order[np.in1d(meg_picks,
-                                pick_types(info, meg='mag', exclude=()))]
+                                pick_types(info, meg='mag', exclude=()),
+                                assume_unique=True)]
 
     # Determine gradiometer imbalances and magnetometer calibrations
     grad_imbalances = np.array([fine_cal['imb_cals'][ri] for ri in rev_grad]).T
@@ -1544,12 +1846,45 @@ def _update_sensor_geometry(info, fine_cal, ignore_ref):
                        grad_coilsets=grad_coilsets, mag_cals=mag_cals)
 
     # Replace sensor locations (and track differences) for fine calibration
-    ang_shift = np.zeros((len(fine_cal['ch_names']), 3))
     used = np.zeros(len(info['chs']), bool)
-    cal_corrs = list()
     cal_chans = list()
     grad_picks = pick_types(info, meg='grad', exclude=())
-    adjust_logged = False
+    # Batch the geometry work over channels: gather all locs once and
+    # extract the coil rotations with a single reshape
+    info_locs = np.array([info['chs'][ii]['loc'] for ii in info_order])
+    cal_locs = np.array(fine_cal['locs'], np.float64)
+    info_rots = _loc_to_coil_rots(info_locs)
+    cal_rots = _loc_to_coil_rots(cal_locs)
+
+    # Some .dat files might only rotate EZ, so we must check first that
+    # EX and EY are orthogonal to EZ; only channels that fail the check
+    # need the per-channel fix-up
+    non_orth = np.abs((cal_rots[:, :, :2] *
+                       cal_rots[:, :, 2:]).sum(axis=1)).max(axis=1) > 1e-6
+    if non_orth.any():
+        logger.info('        Adjusting non-orthogonal EX and EY')
+        for ci in np.where(non_orth)[0]:
+            # find the rotation matrix that goes from one to the other
+            this_trans = _find_vector_rotation(info_rots[ci, :, 2].copy(),
+                                               cal_rots[ci, :, 2].copy())
+            cal_locs[ci, 3:] = np.dot(this_trans, info_rots[ci]).T.ravel()
+
+    # calculate shift angle (cf. _normalize_vectors, which works on rows)
+    v1 = _loc_to_coil_rots(cal_locs).copy()
+    v2 = info_rots.copy()
+    for v in (v1, v2):
+        size = np.sqrt(np.sum(v * v, axis=2))
+        size[size == 0] = 1.  # avoid divide-by-zero
+        v /= size[:, :, np.newaxis]
+    ang_shift = np.einsum('nij,nij->nj', v1, v2)
+    del v1, v2
+
+    is_grad = np.in1d(info_order, grad_picks, assume_unique=True)
+    imb_0 = np.array([imb[0] for imb in fine_cal['imb_cals']])
+    extras = np.where(is_grad[:, np.newaxis],
+                      np.column_stack((np.ones_like(imb_0), imb_0)),
+                      np.column_stack((imb_0, np.zeros_like(imb_0))))
+    cal_corrs = np.concatenate([extras, cal_locs], axis=1)
     for ci, info_idx in enumerate(info_order):
         assert ch_names[info_idx] == fine_cal['ch_names'][ci]
         assert not used[info_idx]
@@ -1557,43 +1892,14 @@ def _update_sensor_geometry(info, fine_cal, ignore_ref):
         info_ch = info['chs'][info_idx]
         ch_num = int(fine_cal['ch_names'][ci].lstrip('MEG').lstrip('0'))
         cal_chans.append([ch_num, info_ch['coil_type']])
-
-        # Some .dat files might only rotate EZ, so we must check first that
-        # EX and EY are orthogonal to EZ. If not, we find the rotation between
-        # the original and fine-cal ez, and rotate EX and EY accordingly:
-        ch_coil_rot = _loc_to_coil_trans(info_ch['loc'])[:3, :3]
-        cal_loc = fine_cal['locs'][ci].copy()
-        cal_coil_rot = _loc_to_coil_trans(cal_loc)[:3, :3]
-        if np.max([np.abs(np.dot(cal_coil_rot[:, ii], cal_coil_rot[:, 2]))
-                   for ii in range(2)]) > 1e-6:  # X or Y not orthogonal
-            if not adjust_logged:
-                logger.info('        Adjusting non-orthogonal EX and EY')
-                adjust_logged = True
-            # find the rotation matrix that goes from one to the other
-            this_trans = _find_vector_rotation(ch_coil_rot[:, 2],
-                                               cal_coil_rot[:, 2])
-            cal_loc[3:] = np.dot(this_trans, ch_coil_rot).T.ravel()
-
-        # calculate shift angle
-        v1 = _loc_to_coil_trans(cal_loc)[:3, :3]
-        _normalize_vectors(v1)
-        v2 = _loc_to_coil_trans(info_ch['loc'])[:3, :3]
-        _normalize_vectors(v2)
-        ang_shift[ci] = np.sum(v1 * v2, axis=0)
-        if info_idx in grad_picks:
-            extra = [1., fine_cal['imb_cals'][ci][0]]
-        else:
-            extra = [fine_cal['imb_cals'][ci][0], 0.]
-        cal_corrs.append(np.concatenate([extra, cal_loc]))
         # Adjust channel normal orientations with those from fine calibration
         # Channel positions are not changed
-        info_ch['loc'][3:] = cal_loc[3:]
+        info_ch['loc'][3:] = cal_locs[ci, 3:]
         assert (info_ch['coord_frame'] == FIFF.FIFFV_COORD_DEVICE)
     assert used[meg_picks].all()
     assert not used[np.setdiff1d(np.arange(len(used)), meg_picks)].any()
     # This gets written to the Info struct
-    sss_cal = dict(cal_corrs=np.array(cal_corrs),
-                   cal_chans=np.array(cal_chans))
+    sss_cal = dict(cal_corrs=cal_corrs, cal_chans=np.array(cal_chans))
 
     # Log quantification of sensor changes
     # Deal with numerical precision giving absolute vals slightly more than 1.
@@ -1607,7 +1913,7 @@ def _update_sensor_geometry(info, fine_cal, ignore_ref):
 
 
 def _get_grad_point_coilsets(info, n_types, ignore_ref):
-    """Get point-type coilsets for gradiometers."""
+    """Get stacked point-type coilsets for gradiometers."""
     grad_coilsets = list()
     grad_info = pick_info(
         info, pick_types(info, meg='grad', exclude=[]), copy=True)
@@ -1620,20 +1926,33 @@ def _get_grad_point_coilsets(info, n_types, ignore_ref):
         for ch in grad_info['chs']:
             ch['coil_type'] = pt_type
         grad_coilsets.append(_prep_mf_coils(grad_info, ignore_ref))
-    return grad_coilsets
+    # Stack the per-direction coilsets into one so _sss_basis_point can
+    # evaluate a single basis instead of one per direction; the sets
+    # share geometry counts, only the point orientations differ
+    n_coils, n_pts = grad_coilsets[0][3], len(grad_coilsets[0][0])
+    for coils in grad_coilsets[1:]:
+        assert coils[3] == n_coils and len(coils[0]) == n_pts
+    rmags = np.concatenate([c[0] for c in grad_coilsets])
+    cosmags = np.concatenate([c[1] for c in grad_coilsets])
+    bins = np.concatenate([c[2] + ii * n_coils
+                           for ii, c in enumerate(grad_coilsets)])
+    mag_mask = np.concatenate([c[4] for c in grad_coilsets])
+    bd = np.concatenate([grad_coilsets[0][5]] +
+                        [c[5][1:] + ii * n_pts
+                         for ii, c in enumerate(grad_coilsets[1:], 1)])
+    return rmags, cosmags, bins, n_types * n_coils, mag_mask, bd
 
 
 def _sss_basis_point(exp, trans, cal, ignore_ref=False, mag_scale=100.):
     """Compute multipolar moments for point-like mags (in fine cal)."""
-    # Loop over all coordinate directions desired and create point mags
-    S_tot = 0.
+    # One basis call over the stacked x/y/z point-mag coilsets
     # These are magnetometers, so use a uniform coil_scale of 100.
     this_cs = np.array([mag_scale], float)
-    for imb, coils in zip(cal['grad_imbalances'], cal['grad_coilsets']):
-        S_add = _trans_sss_basis(exp, coils, trans, this_cs)
-        # Scale spaces by gradiometer imbalance
-        S_add *= imb[:, np.newaxis]
-        S_tot += S_add
+    imbalances = cal['grad_imbalances']
+    S_point = _trans_sss_basis(exp, cal['grad_coilsets'], trans, this_cs)
+    S_point = S_point.reshape(len(imbalances), -1, S_point.shape[1])
+    # Scale spaces by gradiometer imbalance and sum over directions
+    S_tot = (S_point * imbalances[:, :, np.newaxis]).sum(axis=0)
 
     # Return point-like mag bases
     return S_tot
@@ -1646,16 +1965,33 @@ def _regularize_out(int_order, ext_order, mag_or_fine):
     return list(out_removes)
 
 
+_reg_constants = dict()
+
+
+def _regularize_constants(int_order, ext_order):
+    """Get the trans-independent regularization tables, memoized.
+
+    The "signal" terms depend only on the expansion orders (i.e., not
+    sensor geometry or head position / expansion origin), so there is no
+    point recomputing them on every head position change.
+    """
+    key = (int_order, ext_order)
+    if key not in _reg_constants:
+        n_in, n_out = _get_n_moments([int_order, ext_order])
+        a_lm_sq = _compute_sphere_activation_in(
+            np.arange(int_order + 1))[0]
+        degrees, orders = _get_degrees_orders(int_order)
+        a_lm_sq = a_lm_sq[degrees]
+        for arr in (a_lm_sq, degrees, orders):
+            arr.setflags(write=False)  # shared, incl. across threads
+        _reg_constants[key] = (n_in, n_out, a_lm_sq, degrees, orders)
+    return _reg_constants[key]
+
+
 def _regularize_in(int_order, ext_order, S_decomp, mag_or_fine):
     """Regularize basis set using idealized SNR measure."""
-    n_in, n_out = _get_n_moments([int_order, ext_order])
-
-    # The "signal" terms depend only on the inner expansion order
-    # (i.e., not sensor geometry or head position / expansion origin)
-    a_lm_sq, rho_i = _compute_sphere_activation_in(
-        np.arange(int_order + 1))
-    degrees, orders = _get_degrees_orders(int_order)
-    a_lm_sq = a_lm_sq[degrees]
+    n_in, n_out, a_lm_sq, degrees, orders = _regularize_constants(
+        int_order, ext_order)
 
     I_tots = np.zeros(n_in)  # we might not traverse all, so use np.zeros
     in_keepers = list(range(n_in))
@@ -1690,18 +2026,31 @@ def _regularize_in(int_order, ext_order, S_decomp, mag_or_fine):
     #     assert len(np.unique(plot_ord)) == n_in
     noise_lev = 5e-13  # noise level in T/m
     noise_lev *= noise_lev  # effectively what would happen by earlier multiply
+    # A Gram-matrix downdate (eigh of S^T S with a row/column deleted per
+    # iteration) would avoid re-running the SVD from scratch, but squaring
+    # halves the resolvable digits and visibly changes which components
+    # get removed exactly when regularization matters most (badly
+    # conditioned bases, e.g. a poor origin), so keep the full SVD
+    # One Fortran-ordered scratch block serves every iteration: LAPACK
+    # wants Fortran order anyway, so gesdd can destroy it in place and
+    # the shrinking column subsets are refilled instead of reallocated
+    this_S_buf = np.empty(S_decomp.shape, order='F')
     for ii in range(n_in):
-        this_S = S_decomp.take(in_keepers + out_keepers, axis=1)
+        cols = in_keepers + out_keepers
+        this_S = this_S_buf[:, :len(cols)]
+        np.take(S_decomp, cols, axis=1, out=this_S)
+        del cols
         u, s, v = linalg.svd(this_S, full_matrices=False, overwrite_a=True,
                              **check_disable)
         del this_S
         eigs[ii] = s[[0, -1]]
         v = v.T[:len(in_keepers)]
         v /= use_norm[in_keepers][:, np.newaxis]
-        eta_lm_sq = np.dot(v * 1. / s, u.T)
+        # u has orthonormal columns, so the row norms of (v / s) . u.T are
+        # the row norms of v / s; skip that (n_keep, n_chan) product, which
+        # costs as much as the SVD itself
+        eta_lm_sq = _sq(v * 1. / s).sum(axis=1)
         del u, s, v
-        eta_lm_sq *= eta_lm_sq
-        eta_lm_sq = eta_lm_sq.sum(axis=1)
         eta_lm_sq *= noise_lev
 
         # Mysterious scale factors to match Elekta, likely due to differences
@@ -1785,7 +2134,8 @@ def _compute_sphere_activation_in(degrees):
     return a_power, rho_i
 
 
-def _trans_sss_basis(exp, all_coils, trans=None, coil_scale=100.):
+def _trans_sss_basis(exp, all_coils, trans=None, coil_scale=100., out=None,
+                     dtype=np.float64):
     """Compute SSS basis (optionally) using a dev<->head trans."""
     if trans is not None:
         if not isinstance(trans, Transform):
@@ -1799,6 +2149,6 @@ def _trans_sss_basis(exp, all_coils, trans=None, coil_scale=100.):
         cs = coil_scale
         coil_scale = np.ones((all_coils[3], 1))
         coil_scale[all_coils[4]] = cs
-    S_tot = _sss_basis(exp, all_coils)
+    S_tot = _sss_basis(exp, all_coils, out=out, dtype=dtype)
     S_tot *= coil_scale
     return S_tot
@@ -284,6 +284,28 @@ def test_other_systems():
     assert_allclose(raw_sss._data, raw_sss_auto._data)
 
 
+def test_maxwell_filter_precision():
+    """Test that mixed-precision filtering stays close to double."""
+    kit_dir = op.join(io_dir, 'kit', 'tests', 'data')
+    with warnings.catch_warnings(record=True):  # head fit
+        raw = read_raw_kit(op.join(kit_dir, 'test.sqd'))
+    picks = pick_types(raw.info, meg=True, exclude=())
+    kwargs = dict(origin=(0., 0., 0.04), coord_frame='meg', ignore_ref=True,
+                  bad_condition='ignore', regularize=None)
+    assert_raises(ValueError, maxwell_filter, raw, precision='single',
+                  **kwargs)
+    for st_duration in (None, 0.5):  # plain SSS and tSSS code paths
+        raw_double = maxwell_filter(raw, st_duration=st_duration,
+                                    precision='double', **kwargs)
+        raw_mixed = maxwell_filter(raw, st_duration=st_duration,
+                                   precision='mixed', **kwargs)
+        diff = np.linalg.norm(raw_double[picks][0] - raw_mixed[picks][0])
+        norm = np.linalg.norm(raw_double[picks][0])
+        # single-precision roundoff; the lower bound guards against the
+        # mixed path silently not being exercised
+        assert_true(0 < diff / norm < 1e-4)
+
+
 def test_spherical_conversions():
     """Test spherical harmonic conversions."""
     # Test our real<->complex conversion functions
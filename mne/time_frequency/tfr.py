@@ -60,32 +60,40 @@ def morlet(sfreq, freqs, n_cycles=7.0, sigma=None, zero_mean=False):
     Ws : list of array
         The wavelets time series.
     """
-    Ws = list()
-    n_cycles = np.atleast_1d(n_cycles)
+    freqs = np.asarray(freqs, dtype=np.float64)
+    n_cycles = np.atleast_1d(np.asarray(n_cycles, dtype=np.float64))
 
     if (n_cycles.size != 1) and (n_cycles.size != len(freqs)):
         raise ValueError("n_cycles should be fixed or defined for "
                          "each frequency.")
-    for k, f in enumerate(freqs):
-        if len(n_cycles) != 1:
-            this_n_cycles = n_cycles[k]
-        else:
-            this_n_cycles = n_cycles[0]
-        # fixed or scale-dependent window
-        if sigma is None:
-            sigma_t = this_n_cycles / (2.0 * np.pi * f)
-        else:
-            sigma_t = this_n_cycles / (2.0 * np.pi * sigma)
-        # this scaling factor is proportional to (Tallon-Baudry 98):
-        # (sigma_t*sqrt(pi))^(-1/2);
-        t = np.arange(0., 5. * sigma_t, 1.0 / sfreq)
-        t = np.r_[-t[::-1], t[1:]]
-        oscillation = np.exp(2.0 * 1j * np.pi * f * t)
-        gaussian_enveloppe = np.exp(-t ** 2 / (2.0 * sigma_t ** 2))
-        if zero_mean:  # to make it zero mean
-            real_offset = np.exp(- 2 * (np.pi * f * sigma_t) ** 2)
-            oscillation -= real_offset
-        W = oscillation * gaussian_enveloppe
+    if n_cycles.size == 1:
+        n_cycles = np.tile(n_cycles, len(freqs))
+    # fixed or scale-dependent window
+    if sigma is None:
+        sigma_t = n_cycles / (2.0 * np.pi * freqs)
+    else:
+        sigma_t = n_cycles / (2.0 * np.pi * sigma)
+    # Build all wavelets at once on the widest symmetric time grid
+    # (one broadcast instead of one loop iteration per frequency), then
+    # cut each one down to its own 5-sigma support. The half lengths
+    # reproduce len(np.arange(0., 5. * sigma_t, 1. / sfreq)).
+    step = 1.0 / sfreq
+    n_halves = np.ceil(5. * sigma_t / step).astype(int)
+    t = np.arange(n_halves.max()) * step
+    t = np.r_[-t[::-1], t[1:]]
+    oscillation = np.exp(2.0 * 1j * np.pi * freqs[:, np.newaxis] * t)
+    gaussian_enveloppe = np.exp(-t ** 2 /
+                                (2.0 * sigma_t[:, np.newaxis] ** 2))
+    if zero_mean:  # to make it zero mean
+        real_offset = np.exp(- 2 * (np.pi * freqs * sigma_t) ** 2)
+        oscillation -= real_offset[:, np.newaxis]
+    W_all = oscillation * gaussian_enveloppe
+    # this scaling factor is proportional to (Tallon-Baudry 98):
+    # (sigma_t*sqrt(pi))^(-1/2);
+    center = n_halves.max() - 1
+    Ws = list()
+    for k, n_half in enumerate(n_halves):
+        W = W_all[k, center - n_half + 1:center + n_half].copy()
         W /= sqrt(0.5) * linalg.norm(W.ravel())
         Ws.append(W)
     return Ws
@@ -640,6 +640,9 @@ def _sph_to_cart(sph):
     return out
 
 
+_n_moments = dict()
+
+
 def _get_n_moments(order):
     """Compute the number of multipolar moments (spherical harmonics).
 
@@ -657,8 +660,18 @@ def _get_n_moments(order):
     M : ndarray
         Number of moments due to each order.
     """
-    order = np.asarray(order, int)
-    return (order + 2) * order
+    # memoized because this gets hit once per window during movement
+    # compensation; results are read-only since they are shared
+    try:
+        key = int(order)
+    except TypeError:
+        key = tuple(int(o) for o in order)
+    if key not in _n_moments:
+        order = np.asarray(order, int)
+        M = (order + 2) * order
+        M.setflags(write=False)
+        _n_moments[key] = M
+    return _n_moments[key]
 
 
 def _sph_to_cart_partials(az, pol, g_rad, g_az, g_pol):
@@ -1067,46 +1080,62 @@ def quat_to_rot(quat):
     bc_2 = 2 * b * c
     bd_2 = 2 * b * d
     cd_2 = 2 * c * d
-    rotation = np.array([(aa + bb - cc - dd, bc_2 - ad_2, bd_2 + ac_2),
-                         (bc_2 + ad_2, aa + cc - bb - dd, cd_2 - ab_2),
-                         (bd_2 - ac_2, cd_2 + ab_2, aa + dd - bb - cc),
-                         ])
-    if quat.ndim > 1:
-        rotation = np.rollaxis(np.rollaxis(rotation, 1, quat.ndim + 1),
-                               0, quat.ndim)
+    # write the components straight into a (..., 3, 3) output instead of
+    # stacking a (3, 3, ...) array and rolling the axes back
+    rotation = np.empty(quat.shape[:-1] + (3, 3))
+    rotation[..., 0, 0] = aa + bb - cc - dd
+    rotation[..., 0, 1] = bc_2 - ad_2
+    rotation[..., 0, 2] = bd_2 + ac_2
+    rotation[..., 1, 0] = bc_2 + ad_2
+    rotation[..., 1, 1] = aa + cc - bb - dd
+    rotation[..., 1, 2] = cd_2 - ab_2
+    rotation[..., 2, 0] = bd_2 - ac_2
+    rotation[..., 2, 1] = cd_2 + ab_2
+    rotation[..., 2, 2] = aa + dd - bb - cc
     return rotation
 
 
-def _one_rot_to_quat(rot):
-    """Convert a rotation matrix to quaternions."""
+def _rot_to_quat(rot):
+    """Convert a set of flattened rotation matrices to quaternions."""
     # see e.g. http://www.euclideanspace.com/maths/geometry/rotations/
     #                 conversions/matrixToQuaternion/
-    t = 1. + rot[0] + rot[4] + rot[8]
-    if t > np.finfo(rot.dtype).eps:
-        s = np.sqrt(t) * 2.
-        qx = (rot[7] - rot[5]) / s
-        qy = (rot[2] - rot[6]) / s
-        qz = (rot[3] - rot[1]) / s
-        # qw = 0.25 * s
-    elif rot[0] > rot[4] and rot[0] > rot[8]:
-        s = np.sqrt(1. + rot[0] - rot[4] - rot[8]) * 2.
-        qx = 0.25 * s
-        qy = (rot[1] + rot[3]) / s
-        qz = (rot[2] + rot[6]) / s
-        # qw = (rot[7] - rot[5]) / s
-    elif rot[4] > rot[8]:
-        s = np.sqrt(1. - rot[0] + rot[4] - rot[8]) * 2
-        qx = (rot[1] + rot[3]) / s
-        qy = 0.25 * s
-        qz = (rot[5] + rot[7]) / s
-        # qw = (rot[2] - rot[6]) / s
-    else:
-        s = np.sqrt(1. - rot[0] - rot[4] + rot[8]) * 2.
-        qx = (rot[2] + rot[6]) / s
-        qy = (rot[5] + rot[7]) / s
-        qz = 0.25 * s
-        # qw = (rot[3] - rot[1]) / s
-    return qx, qy, qz
+    # The four branches of the scalar algorithm partition the batch, so
+    # evaluate each branch vectorized over its subset of matrices
+    quat = np.empty(rot.shape[:-1] + (3,))
+    t = 1. + rot[:, 0] + rot[:, 4] + rot[:, 8]
+    case_0 = t > np.finfo(rot.dtype).eps
+    case_1 = ~case_0 & (rot[:, 0] > rot[:, 4]) & (rot[:, 0] > rot[:, 8])
+    case_2 = ~case_0 & ~case_1 & (rot[:, 4] > rot[:, 8])
+    case_3 = ~(case_0 | case_1 | case_2)
+
+    r = rot[case_0]
+    s = np.sqrt(t[case_0]) * 2.
+    quat[case_0, 0] = (r[:, 7] - r[:, 5]) / s
+    quat[case_0, 1] = (r[:, 2] - r[:, 6]) / s
+    quat[case_0, 2] = (r[:, 3] - r[:, 1]) / s
+    # qw = 0.25 * s
+
+    r = rot[case_1]
+    s = np.sqrt(1. + r[:, 0] - r[:, 4] - r[:, 8]) * 2.
+    quat[case_1, 0] = 0.25 * s
+    quat[case_1, 1] = (r[:, 1] + r[:, 3]) / s
+    quat[case_1, 2] = (r[:, 2] + r[:, 6]) / s
+    # qw = (r[:, 7] - r[:, 5]) / s
+
+    r = rot[case_2]
+    s = np.sqrt(1. - r[:, 0] + r[:, 4] - r[:, 8]) * 2
+    quat[case_2, 0] = (r[:, 1] + r[:, 3]) / s
+    quat[case_2, 1] = 0.25 * s
+    quat[case_2, 2] = (r[:, 5] + r[:, 7]) / s
+    # qw = (r[:, 2] - r[:, 6]) / s
+
+    r = rot[case_3]
+    s = np.sqrt(1. - r[:, 0] - r[:, 4] + r[:, 8]) * 2.
+    quat[case_3, 0] = (r[:, 2] + r[:, 6]) / s
+    quat[case_3, 1] = (r[:, 5] + r[:, 7]) / s
+    quat[case_3, 2] = 0.25 * s
+    # qw = (r[:, 3] - r[:, 1]) / s
+    return quat
 
 
 def rot_to_quat(rot):
@@ -1127,8 +1156,8 @@ def rot_to_quat(rot):
     --------
     quat_to_rot
     """
-    rot = rot.reshape(rot.shape[:-2] + (9,))
-    return np.apply_along_axis(_one_rot_to_quat, -1, rot)
+    shape = rot.shape[:-2]
+    return _rot_to_quat(rot.reshape(-1, 9)).reshape(shape + (3,))
 
 
 def _angle_between_quats(x, y):